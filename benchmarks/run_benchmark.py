@@ -0,0 +1,477 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from utils.common_utils import get_env_float
+
+# Offline load benchmark for /analyze, /history and /login.
+#
+# By default the app runs in-process against fakes, so a run needs no
+# network, API keys or MongoDB:
+#   GEMINI_BACKEND=fake  gemini/gemini_fake.py, JSON built from the prompt
+#   LLAMA_BACKEND=fake   llama/llama_fake.py, local extraction after a delay
+#   MONGO_BACKEND=memory mongomock + mongomock-motor (pip install both;
+#                        they are not runtime requirements)
+# The fakes' latency and error rates come from the --gemini-*/--llama-*
+# options. With --base-url the same scenarios are driven against a running
+# server instead (start it with whatever backends you want to measure).
+#
+# Every (scenario, concurrency) pair runs --requests requests from a closed
+# loop of `concurrency` workers. Results, with throughput, latency
+# percentiles and memory, go to --output as JSON; --compare prints the
+# change against an earlier results file.
+#
+#   python -m benchmarks.run_benchmark --concurrency 1,4,16 --requests 200 \
+#       --label baseline --output baseline.json
+#   python -m benchmarks.run_benchmark --label change --output change.json \
+#       --compare baseline.json
+
+SCENARIOS = ("analyze", "history", "login")
+
+BENCH_COMPANY_ID = "bench-company"
+BENCH_USER_EMAIL = "bench.user@example.com"
+BENCH_USER_PASSWORD = "bench-password"
+USER_HEADERS = {"x-user-role": "company_admin", "x-user-id": "bench-user", "x-company-id": BENCH_COMPANY_ID}
+ADMIN_HEADERS = {"x-user-role": "super_admin", "x-user-id": "bench-admin"}
+
+BENCH_JD = {
+    "client_name": "Bench Client",
+    "jd_title": "Backend Engineer",
+    "required_experience": "3-5",
+    "primary_skills": ["Python", "FastAPI", "MongoDB", "Docker", "AWS"],
+    "secondary_skills": ["Kubernetes", "Redis", "React"],
+}
+_SKILL_POOL = ["Python", "FastAPI", "MongoDB", "Docker", "AWS", "Kubernetes", "Redis", "React",
+               "Java", "Go", "PostgreSQL", "Terraform", "Kafka", "GraphQL", "Linux"]
+
+# Fake backend settings: option name -> (environment variable, default).
+# All floats, like the fakes read them (get_env_float)
+FAKE_SETTINGS = {
+    "gemini_latency_ms": ("FAKE_GEMINI_LATENCY_MS", 1500.0),
+    "gemini_429_rate": ("FAKE_GEMINI_429_RATE", 0.0),
+    "gemini_5xx_rate": ("FAKE_GEMINI_5XX_RATE", 0.0),
+    "gemini_invalid_rate": ("FAKE_GEMINI_INVALID_RATE", 0.0),
+    "llama_latency_ms": ("FAKE_LLAMA_LATENCY_MS", 3000.0),
+    "llama_error_rate": ("FAKE_LLAMA_ERROR_RATE", 0.0),
+}
+
+
+# --------------------
+# Test data
+# --------------------
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(lines: List[str]) -> bytes:
+    """Single-page PDF with one line of Helvetica text per entry."""
+    stream = "BT /F1 11 Tf 50 790 Td 14 TL " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+def build_resume(index: int, rng: random.Random) -> Tuple[str, bytes]:
+    """A distinct resume per index, so parse/analysis caches don't short-circuit the run."""
+    skills = rng.sample(_SKILL_POOL, 6)
+    run_id = uuid.uuid4().hex[:8]
+    lines = [
+        f"Candidate {index:05d} {run_id}",
+        f"candidate{index}.{run_id}@example.com | +1 555 {index % 10000:04d}",
+        "",
+        "SUMMARY",
+        f"Backend engineer with {rng.randint(2, 9)} years building web services and data pipelines.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
+        "Software Engineer, Acme Corp (01/2021 - Present)",
+        f"- Built APIs in {skills[0]} and {skills[1]} serving 2M requests per day.",
+        f"- Moved batch jobs to {skills[2]}, cutting run time by 40 percent.",
+        "Junior Developer, Initech (06/2018 - 12/2020)",
+        f"- Maintained internal tools with {skills[3]} and {skills[4]}.",
+        "",
+        "EDUCATION",
+        "B.Sc. Computer Science, State University, 2018",
+    ]
+    return f"resume_{index:05d}.pdf", build_pdf(lines)
+
+
+# --------------------
+# Measurement
+# --------------------
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class MemorySampler:
+    """Highest RSS seen while a scenario runs (ru_maxrss only ever grows)."""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            rss = current_rss_mb()
+            if rss is not None:
+                self.peak = max(self.peak or 0.0, rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+# --------------------
+# Scenarios
+# --------------------
+class Scenario:
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.rng = random.Random(seed)
+        self._resume_index = 0
+
+    def next_resume(self) -> Tuple[str, bytes]:
+        self._resume_index += 1
+        return build_resume(self._resume_index, self.rng)
+
+    async def analyze(self) -> httpx.Response:
+        filename, content = self.next_resume()
+        return await self.client.post(
+            "/analyze",
+            headers=USER_HEADERS,
+            files={"resume": (filename, content, "application/pdf")},
+            data={"jd_data": json.dumps(BENCH_JD)},
+        )
+
+    async def history(self) -> httpx.Response:
+        params = {"limit": 50}
+        # One in four pages also filters, like the dashboard's search box
+        if self.rng.random() < 0.25:
+            params["min_score"] = self.rng.choice([40, 60, 80])
+        return await self.client.get("/history", headers=USER_HEADERS, params=params)
+
+    async def login(self) -> httpx.Response:
+        return await self.client.post("/login", json={"email": BENCH_USER_EMAIL, "password": BENCH_USER_PASSWORD})
+
+
+async def seed_data(client: httpx.AsyncClient, scenario: Scenario, analyses: int) -> None:
+    """Create the login user and enough analyses for /history to page through."""
+    response = await client.post("/users", headers=ADMIN_HEADERS, json={
+        "email": BENCH_USER_EMAIL,
+        "password": BENCH_USER_PASSWORD,
+        "name": "Bench User",
+        "company_id": BENCH_COMPANY_ID,
+    })
+    if response.status_code != 200:
+        print(f"Seeding the login user returned {response.status_code}: {response.text[:200]}")
+
+    remaining = {"count": analyses}
+
+    async def worker() -> None:
+        while remaining["count"] > 0:
+            remaining["count"] -= 1
+            await scenario.analyze()
+
+    await asyncio.gather(*(worker() for _ in range(min(16, max(1, analyses)))))
+    print(f"Seeded the login user and {analyses} analyses")
+
+
+async def run_scenario(scenario: Scenario, name: str, concurrency: int, total: int) -> Dict[str, Any]:
+    call = getattr(scenario, name)
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    remaining = {"count": total}
+
+    async def worker() -> None:
+        while remaining["count"] > 0:
+            remaining["count"] -= 1
+            started = time.perf_counter()
+            try:
+                response = await call()
+                status = str(response.status_code)
+            except Exception as e:
+                status = "exception"
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+    sampler = MemorySampler()
+    rss_before = current_rss_mb()
+    sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+    await sampler.stop()
+
+    latencies.sort()
+    ok = sum(count for status, count in status_counts.items() if status.startswith("2"))
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": ok,
+        "failed": total - ok,
+        "status_counts": status_counts,
+        "exceptions": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(total / duration, 3) if duration else 0.0,
+        "ok_throughput_rps": round(ok / duration, 3) if duration else 0.0,
+        "latency_ms": {
+            "min": round(latencies[0], 1) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(latencies[-1], 1) if latencies else 0.0,
+        },
+        "memory_mb": {
+            "rss_before": rss_before,
+            "rss_after": current_rss_mb(),
+            "rss_peak": sampler.peak,
+            "process_peak": peak_rss_mb(),
+        },
+    }
+
+
+# --------------------
+# Runner
+# --------------------
+def configure_offline_env(args: argparse.Namespace, workdir: str) -> None:
+    """Point the app at the fakes. Must run before main is imported."""
+    os.environ["GEMINI_BACKEND"] = "fake"
+    os.environ["LLAMA_BACKEND"] = "fake"
+    os.environ["MONGO_BACKEND"] = "memory"
+    os.environ["MONGO_DB"] = "resume_benchmark"
+    os.environ["BLOB_STORE"] = "disk"
+    os.environ["BLOB_STORE_PATH"] = os.path.join(workdir, "blobs")
+    # Background job workers only poll; nothing here queues jobs
+    os.environ.setdefault("JOB_WORKERS", "0")
+    for option, (env_name, _) in FAKE_SETTINGS.items():
+        os.environ[env_name] = str(getattr(args, option))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    app = None
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        workdir = tempfile.mkdtemp(prefix="resume-bench-")
+        configure_offline_env(args, workdir)
+        from main import app
+
+        await app.router.startup()
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://benchmark"
+
+    results = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+            scenario = Scenario(client, args.seed)
+            if args.seed_analyses or "login" in args.scenarios:
+                # Seed without fake latency when in-process; the server's own settings otherwise
+                saved = {env_name: os.environ.get(env_name) for env_name, _ in FAKE_SETTINGS.values()}
+                if app is not None:
+                    for env_name, _ in FAKE_SETTINGS.values():
+                        os.environ[env_name] = "0"
+                await seed_data(client, scenario, args.seed_analyses)
+                for env_name, value in saved.items():
+                    if value is not None:
+                        os.environ[env_name] = value
+
+            for name in args.scenarios:
+                for concurrency in args.concurrency:
+                    if args.warmup:
+                        await run_scenario(scenario, name, concurrency, args.warmup)
+                    result = await run_scenario(scenario, name, concurrency, args.requests)
+                    latency = result["latency_ms"]
+                    print(
+                        f"{name:<8} c={concurrency:<4} {result['throughput_rps']:8.2f} req/s"
+                        f"  p50={latency['p50']:.0f}ms p95={latency['p95']:.0f}ms p99={latency['p99']:.0f}ms"
+                        f"  ok={result['ok']}/{result['requests']}  rss_peak={result['memory_mb']['rss_peak']}MB"
+                    )
+                    results.append(result)
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+
+    return {
+        "label": args.label,
+        "started_at": datetime.now().isoformat(),
+        "mode": "external" if args.base_url else "in-process",
+        "config": {
+            "base_url": args.base_url,
+            "scenarios": args.scenarios,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed_analyses": args.seed_analyses,
+            "seed": args.seed,
+            # Only applied to in-process runs
+            "fakes": {option: getattr(args, option) for option in FAKE_SETTINGS},
+            "parse_mode": os.getenv("PARSE_MODE", "llama_first"),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_commit": git_commit(),
+        },
+        # Memory is this process: server and load generator together in-process,
+        # the load generator alone with --base-url
+        "results": results,
+    }
+
+
+def compare_results(previous: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per (scenario, concurrency) change in throughput and tail latency."""
+    before = {(row["scenario"], row["concurrency"]): row for row in previous.get("results", [])}
+    rows = []
+    for row in current["results"]:
+        old = before.get((row["scenario"], row["concurrency"]))
+        if not old:
+            continue
+
+        def change(new_value: float, old_value: float) -> Optional[float]:
+            return round((new_value - old_value) / old_value * 100, 1) if old_value else None
+
+        rows.append({
+            "scenario": row["scenario"],
+            "concurrency": row["concurrency"],
+            "throughput_rps": (old["throughput_rps"], row["throughput_rps"],
+                               change(row["throughput_rps"], old["throughput_rps"])),
+            "p95_ms": (old["latency_ms"]["p95"], row["latency_ms"]["p95"],
+                       change(row["latency_ms"]["p95"], old["latency_ms"]["p95"])),
+            "p99_ms": (old["latency_ms"]["p99"], row["latency_ms"]["p99"],
+                       change(row["latency_ms"]["p99"], old["latency_ms"]["p99"])),
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], previous_label: Optional[str]) -> None:
+    print(f"\nCompared with {previous_label or 'previous run'}:")
+    if not rows:
+        print("  no scenario/concurrency pairs in common")
+    for row in rows:
+        parts = []
+        for key in ("throughput_rps", "p95_ms", "p99_ms"):
+            old, new, pct = row[key]
+            parts.append(f"{key} {old} -> {new}" + (f" ({pct:+.1f}%)" if pct is not None else ""))
+        print(f"  {row['scenario']:<8} c={row['concurrency']:<4} " + "  ".join(parts))
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description="Load benchmark for /analyze, /history and /login")
+    arg_parser.add_argument("--scenarios", type=_csv, default=list(SCENARIOS),
+                            help="Comma-separated, from: " + ", ".join(SCENARIOS))
+    arg_parser.add_argument("--concurrency", type=lambda v: [int(c) for c in _csv(v)], default=[1, 4, 16],
+                            help="Comma-separated concurrency levels")
+    arg_parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and level")
+    arg_parser.add_argument("--warmup", type=int, default=0, help="Unmeasured requests before each level")
+    arg_parser.add_argument("--seed-analyses", type=int, default=50, help="Analyses created before measuring")
+    arg_parser.add_argument("--seed", type=int, default=1, help="Random seed for generated resumes")
+    arg_parser.add_argument("--base-url", help="Benchmark a running server instead of the in-process app")
+    arg_parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    arg_parser.add_argument("--label", default="", help="Name for this run, stored in the results")
+    arg_parser.add_argument("--output", default="benchmark-results.json", help="Results file (JSON)")
+    arg_parser.add_argument("--compare", help="Earlier results file to compare against")
+    for option, (env_name, default) in FAKE_SETTINGS.items():
+        arg_parser.add_argument(f"--{option.replace('_', '-')}", type=float,
+                                default=get_env_float(env_name, default),
+                                help=f"Fake backend setting ({env_name}, default {default})")
+    args = arg_parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        arg_parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+    if any(level < 1 for level in args.concurrency) or args.requests < 1:
+        arg_parser.error("--concurrency levels and --requests must be positive")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run_benchmark(args))
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        report["comparison"] = {"against": previous.get("label") or args.compare,
+                                "rows": compare_results(previous, report)}
+        print_comparison(report["comparison"]["rows"], report["comparison"]["against"])
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
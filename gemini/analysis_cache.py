@@ -0,0 +1,149 @@
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from utils.common_utils import get_env_int, to_init_caps
+
+
+def normalize_experience_range(value: Optional[str]) -> str:
+    """Collapse '3 - 5', ' 4 + ' and '5' style inputs to '3-5', '4+', '5'."""
+    if not value:
+        return ""
+    return re.sub(r"\s+", "", str(value))
+
+
+def _normalize_skills(skills: Optional[List[str]]) -> List[str]:
+    return sorted({" ".join(skill.split()).casefold() for skill in (skills or []) if skill and skill.strip()})
+
+
+def _normalize_name(name: Optional[str]) -> str:
+    return (to_init_caps(name) or "").casefold()
+
+
+def canonicalize_jd(jd_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Canonical form of a JDData dict, so that reordered or differently cased
+    skills and spacing in the experience range map to the same cache entry.
+    """
+    return {
+        "client_name": _normalize_name(jd_data.get("client_name")),
+        "jd_title": _normalize_name(jd_data.get("jd_title")),
+        "required_experience": normalize_experience_range(jd_data.get("required_experience")),
+        "min_experience": jd_data.get("min_experience"),
+        "max_experience": jd_data.get("max_experience"),
+        "primary_skills": _normalize_skills(jd_data.get("primary_skills")),
+        "secondary_skills": _normalize_skills(jd_data.get("secondary_skills")),
+    }
+
+
+def make_analysis_key(company_id: str, resume_sha256: str, jd_data: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"company_id": company_id, "resume": resume_sha256, "jd": canonicalize_jd(jd_data)},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    TTL + LRU memo of Gemini analyses keyed by (company, resume hash,
+    canonical JD). Entries are also indexed by (company, client, JD title)
+    so an updated JD drops every analysis made against its old version.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Tuple[str, str, str]]]" = OrderedDict()
+        self._by_jd: Dict[Tuple[str, str, str], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    @staticmethod
+    def _jd_ref(company_id: str, client_name: Optional[str], jd_title: Optional[str]) -> Tuple[str, str, str]:
+        return (company_id, _normalize_name(client_name), _normalize_name(jd_title))
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._by_jd.get(entry[2])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_jd[entry[2]]
+
+    def get(self, company_id: str, resume_sha256: str, jd_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = make_analysis_key(company_id, resume_sha256, jd_data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, company_id: str, resume_sha256: str, jd_data: Dict[str, Any], analysis: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        key = make_analysis_key(company_id, resume_sha256, jd_data)
+        jd_ref = self._jd_ref(company_id, jd_data.get("client_name"), jd_data.get("jd_title"))
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(analysis), jd_ref)
+            self._by_jd.setdefault(jd_ref, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_jd(self, company_id: str, client_name: str, jd_title: str) -> int:
+        """
+        Forget every cached analysis made against this JD.
+        :return: Number of entries removed
+        """
+        jd_ref = self._jd_ref(company_id, client_name, jd_title)
+        with self._lock:
+            keys = list(self._by_jd.get(jd_ref, ()))
+            for key in keys:
+                self._drop(key)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """
+    Shared cache configured by ANALYSIS_CACHE_TTL (seconds, 0 disables,
+    default 3600) and ANALYSIS_CACHE_MAX_ENTRIES (default 1024).
+    """
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache(
+            ttl_seconds=get_env_int("ANALYSIS_CACHE_TTL", 3600),
+            max_entries=get_env_int("ANALYSIS_CACHE_MAX_ENTRIES", 1024),
+        )
+    return _analysis_cache
@@ -0,0 +1,126 @@
+import json
+import math
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.common_utils import get_env_float
+from utils.skill_utils import match_skills
+
+# Offline stand-in for genai.GenerativeModel, selected with
+# GEMINI_BACKEND=fake (see initialize_gemini). It answers with analysis
+# JSON built from the prompt itself (skills found by the local matcher),
+# so load tests exercise the real validation and post-processing without
+# spending API quota. Latency and failures are drawn per call:
+#   FAKE_GEMINI_LATENCY_MS    median latency (default 1500)
+#   FAKE_GEMINI_LATENCY_SIGMA lognormal spread (default 0.35)
+#   FAKE_GEMINI_429_RATE      share of calls failing with 429 (default 0)
+#   FAKE_GEMINI_5XX_RATE      share of calls failing with 503 (default 0)
+#   FAKE_GEMINI_INVALID_RATE  share of responses that are broken JSON (default 0)
+
+_PROMPT_PARTS = re.compile(r"JOB DESCRIPTION: (?P<jd>.*?)\nRESUME:\n(?P<resume>.*)", re.S)
+
+
+class FakeGeminiError(Exception):
+    """Shaped like google.api_core errors: HTTP status in .code."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class _UsageMetadata:
+    def __init__(self, prompt: str, text: str):
+        # Roughly four characters per token
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeResponse:
+    """Enough of GenerateContentResponse: .text, .usage_metadata and chunk iteration."""
+
+    def __init__(self, text: str, prompt: str, chunks: Optional[List[str]] = None, chunk_delay: float = 0.0):
+        self.text = text
+        self.usage_metadata = _UsageMetadata(prompt, text)
+        self._chunks = chunks or [text]
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self) -> Iterator[_Chunk]:
+        for chunk in self._chunks:
+            time.sleep(self._chunk_delay)
+            yield _Chunk(chunk)
+
+
+def _latency_seconds() -> float:
+    median = get_env_float("FAKE_GEMINI_LATENCY_MS", 1500) / 1000
+    sigma = get_env_float("FAKE_GEMINI_LATENCY_SIGMA", 0.35)
+    return median * math.exp(random.gauss(0, sigma)) if median > 0 else 0.0
+
+
+def build_fake_analysis(prompt: str) -> Dict[str, Any]:
+    """A schema-valid analysis consistent with the JD and resume in the prompt."""
+    match = _PROMPT_PARTS.search(prompt)
+    jd = json.loads(match.group("jd")) if match else {}
+    resume = match.group("resume") if match else ""
+    skills = match_skills(resume, jd)
+    name = next((line.strip() for line in resume.splitlines() if line.strip()), "Not specified")
+    return {
+        "candidate_info": {"candidate_name": name[:60]},
+        "skill_analysis": skills,
+        "experience_analysis": {
+            "positions": [
+                {"company": "Acme Corp", "title": "Software Engineer", "duration": "01/2021 - Present",
+                 "domain": "Software", "is_internship": False, "employment_type": "full-time",
+                 "duration_missing": False},
+                {"company": "Initech", "title": "Junior Developer", "duration": "06/2018 - 12/2020",
+                 "domain": "Software", "is_internship": False, "employment_type": "full-time",
+                 "duration_missing": False},
+            ],
+        },
+        "profile_feedback": {
+            "freelancer_status": False,
+            "has_linkedin": False,
+            "linkedin_url": "",
+            "has_email": False,
+            "candidate_email": "",
+        },
+        "suggestions": ["Quantify achievements in recent roles"],
+        "summary": f"Matches {len(skills['matching_skills'])} of the primary skills.",
+    }
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name: str = "fake-gemini"):
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str, generation_config: Any = None, stream: bool = False) -> FakeResponse:
+        latency = _latency_seconds()
+        roll = random.random()
+        rate_limited = get_env_float("FAKE_GEMINI_429_RATE", 0.0)
+        unavailable = get_env_float("FAKE_GEMINI_5XX_RATE", 0.0)
+        if roll < rate_limited:
+            # Rejections come back quickly
+            time.sleep(min(latency, 0.05))
+            raise FakeGeminiError(429, "Resource has been exhausted (e.g. check quota).")
+        if roll < rate_limited + unavailable:
+            time.sleep(latency)
+            raise FakeGeminiError(503, "The model is overloaded. Please try again later.")
+
+        text = json.dumps(build_fake_analysis(prompt))
+        if random.random() < get_env_float("FAKE_GEMINI_INVALID_RATE", 0.0):
+            text = text[: len(text) // 2]
+
+        if not stream:
+            time.sleep(latency)
+            return FakeResponse(text, prompt)
+        # The first chunk arrives after a quarter of the latency, the rest spread over the remainder
+        chunks = [text[i:i + 64] for i in range(0, len(text), 64)]
+        time.sleep(latency / 4)
+        return FakeResponse(text, prompt, chunks, chunk_delay=(latency * 3 / 4) / len(chunks))
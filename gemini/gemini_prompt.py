@@ -0,0 +1,187 @@
+import json
+import re
+import textwrap
+import threading
+from typing import Any, Dict
+
+# The analysis prompt is a fixed instruction block followed by the
+# per-call context (the JD and the resume). The fixed block is
+# built once at import time and always comes first, so it is byte-identical
+# across calls.
+
+_INSTRUCTIONS = textwrap.dedent("""
+    Perform a comprehensive analysis of the RESUME against the JOB DESCRIPTION (JSON) below.
+    CANDIDATE IDENTIFICATION:
+        - Extract candidate_name (full name from resume header section)
+        - If no name can be identified, return "Not specified"
+    1. SKILL MATCH ANALYSIS:
+        - Calculate match_score (0-100) **based ONLY on primary skill matches**
+        - List matching_skills (only primary skills that are found)
+        - List missing_primary_skills (primary skills not found)
+        - List matching_secondary_skills (secondary skills found — NOT used for match_score)
+        - List missing_secondary_skills (secondary skills not found)
+        Note: Do NOT include secondary skills in match_score calculation. They are only for profile feedback.
+    2. EXPERIENCE ANALYSIS:
+       - Extract all work positions with:
+         * company
+         * title
+         * duration (normalized to MM/YYYY - MM/YYYY format, "Present" as the end of current roles)
+         * domain
+         * internship flag
+         * employment_type (full-time, contract, freelance, internship)
+       - For positions missing dates: mark with "duration_missing": true
+       - If no companies found, mark as fresher
+       - Durations, total_experience and experience_match are computed from these dates; do not calculate them
+    3. PROFILE FEEDBACK:
+       - freelancer_status: true if any position is freelance/contract (mention in summary)
+       - has_linkedin: true if LinkedIn URL found (show URL if available)
+       - has_email: true if email found (show email if available)
+    4. IMPROVEMENT SUGGESTIONS:
+       - List specific suggestions for improving resume
+    5. SUMMARY:
+       - Provide overall assessment including:
+         * Experience status
+         * If any matching secondary skills are found, mention them as "Additional Advantage: [skill1, skill2,...]"
+    Rules for Experience Analysis:
+    - Normalize all dates to MM/YYYY format
+    - If any position is missing dates, include in analysis but mark appropriately
+    - If no companies found, clearly indicate this is a fresher profile
+""").strip()
+
+_EXAMPLE_OUTPUT = {
+    "candidate_info": {"candidate_name": "John Doe"},
+    "skill_analysis": {
+        "match_score": 75,
+        "matching_skills": ["Python", "ML"],
+        "missing_primary_skills": ["AWS"],
+        "missing_secondary_skills": ["Docker"],
+    },
+    "experience_analysis": {
+        "positions": [{
+            "company": "ABC Corp",
+            "title": "Software Engineer",
+            "duration": "01/2020 - 06/2022",
+            "domain": "IT",
+            "is_internship": False,
+            "employment_type": "full-time",
+            "duration_missing": False,
+        }],
+        "is_fresher": False,
+        "positions_with_missing_dates": 1,
+        "experience_status": "Partial dates available (1 position missing dates)",
+    },
+    "profile_feedback": {
+        "freelancer_status": False,
+        "has_linkedin": True,
+        "linkedin_url": "https://linkedin.com/in/example",
+        "has_email": True,
+        "candidate_email": "example@email.com",
+    },
+    "suggestions": ["Add AWS certification", "Add missing employment dates"],
+    "summary": "Strong technical skills but lacks cloud experience. Partial work history available.",
+}
+
+STATIC_PROMPT = (
+    _INSTRUCTIONS
+    + "\n\nReturn STRICT JSON with this structure:\n"
+    + json.dumps(_EXAMPLE_OUTPUT, separators=(",", ":"), ensure_ascii=False)
+    + "\nReturn ONLY valid JSON with no additional text or formatting."
+)
+
+# JDData fields the model needs; client_name etc. are bookkeeping only
+JD_PROMPT_FIELDS = (
+    "jd_title",
+    "required_experience",
+    "min_experience",
+    "max_experience",
+    "primary_skills",
+    "secondary_skills",
+)
+
+_HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def serialize_jd(jd_data: Dict[str, Any]) -> str:
+    """The JD as compact JSON, without empty fields."""
+    jd = {key: jd_data.get(key) for key in JD_PROMPT_FIELDS if jd_data.get(key) not in (None, "", [])}
+    return json.dumps(jd, separators=(",", ":"), ensure_ascii=False)
+
+
+def normalize_resume_text(text: str) -> str:
+    """
+    Collapse runs of spaces/tabs (including non-breaking and other unicode
+    spaces), strip every line and keep at most one blank line in a row.
+    """
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_HORIZONTAL_SPACE.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def build_analysis_prompt(resume_text: str, jd_data: Dict[str, Any]) -> str:
+    return (
+        f"{STATIC_PROMPT}\n\n"
+        f"JOB DESCRIPTION: {serialize_jd(jd_data)}\n"
+        f"RESUME:\n{normalize_resume_text(resume_text)}"
+    )
+
+
+class TokenUsageStats:
+    """Running totals of Gemini token usage and latency, for /health."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.prompt_chars = 0
+        self.latency_ms = 0.0
+        self.last: Dict[str, Any] = {}
+
+    def record(self, usage: Dict[str, Any]) -> None:
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.output_tokens += usage["output_tokens"]
+            self.prompt_chars += usage["prompt_chars"]
+            self.latency_ms += usage["latency_ms"]
+            self.last = usage
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.calls or 1
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "avg_prompt_tokens": round(self.prompt_tokens / calls, 1),
+                "avg_output_tokens": round(self.output_tokens / calls, 1),
+                "avg_prompt_chars": round(self.prompt_chars / calls, 1),
+                "avg_latency_ms": round(self.latency_ms / calls, 1),
+                "last": self.last,
+            }
+
+
+_token_usage = TokenUsageStats()
+
+
+def record_usage(response, prompt: str, latency_ms: float) -> Dict[str, Any]:
+    """
+    Pull token counts from response.usage_metadata (zeros if the SDK didn't
+    return any) and add them to the running totals.
+    :return: The usage row for this call
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    usage = {
+        "prompt_tokens": getattr(metadata, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(metadata, "candidates_token_count", 0) or 0,
+        "total_tokens": getattr(metadata, "total_token_count", 0) or 0,
+        "prompt_chars": len(prompt),
+        "latency_ms": round(latency_ms, 1),
+    }
+    _token_usage.record(usage)
+    return usage
+
+
+def get_token_usage_stats() -> Dict[str, Any]:
+    return _token_usage.stats()
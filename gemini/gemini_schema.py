@@ -0,0 +1,215 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+from pydantic import BaseModel, Extra, Field
+
+# Typed shape of the analysis Gemini returns. The same shape is declared
+# to the API as a response schema (JSON mode), so a well-behaved response
+# validates in one pass and nothing needs to be scraped out with regexes.
+
+
+class CandidateInfo(BaseModel):
+    candidate_name: str = "Not specified"
+
+    class Config:
+        extra = Extra.ignore
+
+
+class SkillAnalysis(BaseModel):
+    match_score: int = Field(0, ge=0, le=100)
+    matching_skills: List[str] = []
+    missing_primary_skills: List[str] = []
+    matching_secondary_skills: List[str] = []
+    missing_secondary_skills: List[str] = []
+
+    class Config:
+        extra = Extra.ignore
+
+
+class Position(BaseModel):
+    company: Optional[str] = None
+    title: Optional[str] = None
+    duration: Optional[str] = None
+    duration_length: Optional[str] = None
+    domain: Optional[str] = None
+    is_internship: bool = False
+    employment_type: Optional[str] = None
+    duration_missing: bool = False
+
+    class Config:
+        extra = Extra.ignore
+
+
+class ExperienceAnalysis(BaseModel):
+    positions: List[Position] = []
+    # Filled in locally (utils.experience_utils), not requested from the model
+    total_experience: Optional[str] = None
+    total_experience_months: int = 0
+    experience_match: bool = False
+    is_fresher: bool = False
+    positions_with_missing_dates: int = 0
+    experience_status: Optional[str] = None
+
+    class Config:
+        extra = Extra.ignore
+
+
+class ProfileFeedback(BaseModel):
+    freelancer_status: bool = False
+    has_linkedin: bool = False
+    linkedin_url: str = ""
+    has_email: bool = False
+    candidate_email: str = ""
+
+    class Config:
+        extra = Extra.ignore
+
+
+class ResumeAnalysis(BaseModel):
+    candidate_info: CandidateInfo = CandidateInfo()
+    skill_analysis: SkillAnalysis = SkillAnalysis()
+    experience_analysis: ExperienceAnalysis = ExperienceAnalysis()
+    profile_feedback: ProfileFeedback = ProfileFeedback()
+    suggestions: List[str] = []
+    summary: str = ""
+
+    class Config:
+        extra = Extra.ignore
+
+
+def _string_list() -> Dict[str, Any]:
+    return {"type": "array", "items": {"type": "string"}}
+
+
+# Gemini's OpenAPI subset: no $ref/defaults, so this is spelled out
+# rather than generated from ResumeAnalysis.schema()
+RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "candidate_info": {
+            "type": "object",
+            "properties": {"candidate_name": {"type": "string"}},
+            "required": ["candidate_name"],
+        },
+        "skill_analysis": {
+            "type": "object",
+            "properties": {
+                "match_score": {"type": "integer"},
+                "matching_skills": _string_list(),
+                "missing_primary_skills": _string_list(),
+                "matching_secondary_skills": _string_list(),
+                "missing_secondary_skills": _string_list(),
+            },
+            "required": ["match_score", "matching_skills", "missing_primary_skills"],
+        },
+        "experience_analysis": {
+            "type": "object",
+            "properties": {
+                "positions": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "company": {"type": "string", "nullable": True},
+                            "title": {"type": "string", "nullable": True},
+                            "duration": {"type": "string", "nullable": True},
+                            "domain": {"type": "string", "nullable": True},
+                            "is_internship": {"type": "boolean"},
+                            "employment_type": {"type": "string", "nullable": True},
+                            "duration_missing": {"type": "boolean"},
+                        },
+                        "required": ["company", "title", "is_internship", "duration_missing"],
+                    },
+                },
+                "is_fresher": {"type": "boolean"},
+                "positions_with_missing_dates": {"type": "integer"},
+                "experience_status": {"type": "string"},
+            },
+            "required": ["positions"],
+        },
+        "profile_feedback": {
+            "type": "object",
+            "properties": {
+                "freelancer_status": {"type": "boolean"},
+                "has_linkedin": {"type": "boolean"},
+                "linkedin_url": {"type": "string"},
+                "has_email": {"type": "boolean"},
+                "candidate_email": {"type": "string"},
+            },
+        },
+        "suggestions": _string_list(),
+        "summary": {"type": "string"},
+    },
+    "required": ["candidate_info", "skill_analysis", "experience_analysis", "profile_feedback", "suggestions", "summary"],
+}
+
+ANALYSIS_GENERATION_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=RESPONSE_SCHEMA,
+)
+
+REPAIR_PROMPT = (
+    "The JSON below does not match the required schema.\n"
+    "Validation error: {error}\n"
+    "Return the corrected JSON only. Keep every value that is already valid; "
+    "fix only what the error points at.\n"
+    "JSON:\n{response_text}"
+)
+
+
+def parse_analysis(response_text: str) -> Dict[str, Any]:
+    """
+    Decode and validate a model response in one pass.
+    :raises ValueError: On invalid JSON or a schema violation (pydantic's
+        ValidationError is a ValueError)
+    """
+    text = response_text.strip()
+    # JSON mode doesn't fence its output, but older models/configs might
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return ResumeAnalysis.parse_obj(json.loads(text)).dict()
+
+
+def build_repair_prompt(response_text: str, error: Exception) -> str:
+    return REPAIR_PROMPT.format(error=str(error)[:1000], response_text=response_text)
+
+
+class OutputStats:
+    """How often Gemini output validates first time vs. needs a repair call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.valid_first_pass = 0
+        self.repaired = 0
+        self.repair_failed = 0
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.responses += 1
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            needed_repair = self.repaired + self.repair_failed
+            return {
+                "responses": self.responses,
+                "valid_first_pass": self.valid_first_pass,
+                "repaired": self.repaired,
+                "repair_failed": self.repair_failed,
+                "repair_rate": round(needed_repair / self.responses, 4) if self.responses else 0.0,
+            }
+
+
+_output_stats = OutputStats()
+
+
+def record_output(outcome: str) -> None:
+    _output_stats.record(outcome)
+
+
+def get_output_stats() -> Dict[str, Any]:
+    return _output_stats.stats()
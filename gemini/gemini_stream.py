@@ -0,0 +1,78 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+# Gemini streams the analysis JSON in arbitrary text chunks. The UI wants
+# each top-level section (candidate_info, skill_analysis, ...) as soon as
+# it is complete, so the stream is scanned incrementally for finished
+# "key": value members of the outer object. The full text is still
+# validated against the schema once the stream ends.
+
+
+class PartialObjectParser:
+    """
+    Incremental scanner for the members of one top-level JSON object.
+    feed() returns the (key, value) pairs completed by the new chunk.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        completed: List[Tuple[str, Any]] = []
+        text = self.text
+        for index in range(self._pos, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._key_start is not None:
+                        self._key = json.loads(text[self._key_start:index + 1])
+                        self._key_start = None
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = index
+                elif self._depth == 1 and self._value_start is None:
+                    self._value_start = index
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2 and self._value_start is None:
+                    self._value_start = index
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth <= 1:
+                    self._complete(index + (1 if self._depth == 1 else 0), completed)
+            elif char == ",":
+                if self._depth == 1:
+                    self._complete(index, completed)
+            elif char == ":" or char.isspace():
+                pass
+            elif self._depth == 1 and self._key is not None and self._value_start is None:
+                # Bare literal: number, true, false, null
+                self._value_start = index
+        self._pos = len(text)
+        return completed
+
+    def _complete(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        if self._key is not None and self._value_start is not None:
+            try:
+                completed.append((self._key, json.loads(self.text[self._value_start:end])))
+            except ValueError:
+                # Malformed member; the final schema validation reports it
+                pass
+        self._key = None
+        self._value_start = None
@@ -0,0 +1,41 @@
+import math
+import os
+import random
+import time
+from typing import List
+
+import docx2txt
+from PyPDF2 import PdfReader
+
+from utils.common_utils import get_env_float
+
+# Offline stand-in for LlamaParse, selected with LLAMA_BACKEND=fake (see
+# initialize_llama_parser). The text comes from local extraction, after a
+# delay shaped like a cloud parse job:
+#   FAKE_LLAMA_LATENCY_MS    median latency (default 3000)
+#   FAKE_LLAMA_LATENCY_SIGMA lognormal spread (default 0.4)
+#   FAKE_LLAMA_ERROR_RATE    share of parses failing with 503 (default 0)
+
+
+class FakeDocument:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeLlamaParse:
+    def __init__(self, result_type: str = "text"):
+        self.result_type = result_type
+
+    def load_data(self, file_path: str) -> List[FakeDocument]:
+        median = get_env_float("FAKE_LLAMA_LATENCY_MS", 3000) / 1000
+        sigma = get_env_float("FAKE_LLAMA_LATENCY_SIGMA", 0.4)
+        time.sleep(median * math.exp(random.gauss(0, sigma)) if median > 0 else 0.0)
+        if random.random() < get_env_float("FAKE_LLAMA_ERROR_RATE", 0.0):
+            raise Exception("503 Service Unavailable: parse job failed")
+
+        if os.path.splitext(file_path)[1].lower() == ".docx":
+            text = docx2txt.process(file_path)
+        else:
+            with open(file_path, "rb") as f:
+                text = "\n".join(page.extract_text() or "" for page in PdfReader(f).pages)
+        return [FakeDocument(text)]
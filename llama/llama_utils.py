@@ -1,13 +1,24 @@
 import os
+import queue
+import threading
+from contextlib import contextmanager
 from llama_parse import LlamaParse
-from typing import Optional
+from typing import Iterator, Optional
 
-def initialize_llama_parser(result_type: str = "json") -> Optional[LlamaParse]:
+from utils.common_utils import get_env_int
+from utils.governor_utils import get_governor
+from utils.metrics_utils import observe_stage
+
+def initialize_llama_parser(result_type: str = "text") -> Optional[LlamaParse]:
     """
     Initializes LlamaParse with the given result type.
-    :param result_type: 'json' or 'text'
+    :param result_type: 'text' or 'markdown'
     :return: LlamaParse object or None
     """
+    if os.getenv("LLAMA_BACKEND", "").lower() == "fake":
+        # Offline stand-in for load tests (llama/llama_fake.py)
+        from llama.llama_fake import FakeLlamaParse
+        return FakeLlamaParse(result_type)
     try:
         api_key = os.getenv("LLAMA_CLOUD_API_KEY")
         if not api_key:
@@ -29,10 +40,70 @@ def parse_resume_with_llama(file_path: str, parser: LlamaParse) -> Optional[str]
     :return: Extracted text
     """
     try:
-        documents = parser.load_data(file_path)
+        with observe_stage("llamaparse"):
+            documents = get_governor("llama").call(parser.load_data, file_path)
         if documents:
             return documents[0].text
         else:
             raise Exception("No documents returned from parser.")
     except Exception as e:
         raise Exception(f"LlamaParse failed: {str(e)}")
+
+
+class LlamaParserPool:
+    """
+    Fixed set of long-lived LlamaParse instances shared across requests.
+    Each parse borrows one instance and hands it back when done.
+    """
+
+    def __init__(self, result_type: str, size: int):
+        self.result_type = result_type
+        self.size = size
+        self._parsers: "queue.Queue[LlamaParse]" = queue.Queue()
+        for _ in range(size):
+            self._parsers.put(initialize_llama_parser(result_type))
+
+    @contextmanager
+    def acquire(self) -> Iterator[LlamaParse]:
+        parser = self._parsers.get()
+        try:
+            yield parser
+        finally:
+            self._parsers.put(parser)
+
+
+_parser_pool: Optional[LlamaParserPool] = None
+_parser_pool_failed = False
+_parser_pool_lock = threading.Lock()
+
+
+def initialize_llama_parser_pool() -> Optional[LlamaParserPool]:
+    """
+    Build the shared parser pool once, using LLAMA_PARSE_RESULT_TYPE
+    ('text' or 'markdown', default 'text') and LLAMA_PARSER_POOL_SIZE
+    (default 4). Returns None when LlamaParse cannot be configured, in
+    which case callers go straight to local extraction.
+    """
+    global _parser_pool, _parser_pool_failed
+    with _parser_pool_lock:
+        if _parser_pool is None and not _parser_pool_failed:
+            result_type = os.getenv("LLAMA_PARSE_RESULT_TYPE", "text")
+            size = max(1, get_env_int("LLAMA_PARSER_POOL_SIZE", 4))
+            try:
+                _parser_pool = LlamaParserPool(result_type, size)
+            except Exception as e:
+                # Don't retry construction on every request
+                _parser_pool_failed = True
+                print(f"LlamaParse pool not initialized: {e}")
+        return _parser_pool
+
+
+@contextmanager
+def acquire_llama_parser() -> Iterator[Optional[LlamaParse]]:
+    """Borrow a pooled parser, or yield None if LlamaParse is unavailable."""
+    pool = _parser_pool or initialize_llama_parser_pool()
+    if pool is None:
+        yield None
+        return
+    with pool.acquire() as parser:
+        yield parser
@@ -2,7 +2,6 @@ from fastapi import FastAPI, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
-import bcrypt
 import os
 from dotenv import load_dotenv
 from typing import Optional
@@ -11,31 +10,78 @@ from datetime import datetime, timedelta
 import smtplib, ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from pymongo import MongoClient
 from pymongo.collection import ReturnDocument
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Query
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Set
 import json
 import os
 import tempfile
-from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import threading
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from io import BytesIO
 
 from dotenv import load_dotenv
 
-from llama.llama_utils import initialize_llama_parser
-from parsing.parsing_utils import parse_resume
-from gemini.gemini_utils import analyze_resume_comprehensive, initialize_gemini
-from mongodb.mongodb_db import (
-    initialize_mongodb,
-    fetch_analysis_history,
+from llama.llama_utils import initialize_llama_parser_pool
+from parsing.parsing_utils import get_parse_stats, parse_resume_file
+from parsing.parse_cache import get_parse_cache, hash_content
+from gemini.gemini_utils import (
+    analyze_resume_comprehensive,
+    build_fast_screen_analysis,
+    initialize_gemini,
+    iter_resume_analysis,
+)
+from gemini.analysis_cache import get_analysis_cache, make_analysis_key
+from gemini.gemini_prompt import get_token_usage_stats
+from gemini.gemini_schema import get_output_stats
+from pipeline.job_queue import JobContext, create_job_worker_pool
+from pipeline.pipeline_utils import get_stage_concurrency, run_resume_pipeline
+from utils.common_utils import get_env_int
+from utils.governor_utils import ProviderUnavailable, get_governor_stats
+from utils.metrics_utils import (
+    ANALYSES_IN_FLIGHT,
+    METRICS_CONTENT_TYPE,
+    observe_stage,
+    record_cache_hit,
+    render_metrics,
+    set_metrics_company,
+)
+from utils.tracing_utils import TracingMiddleware, get_profile_path, span
+from utils.password_utils import (
+    get_password_pool_stats,
+    hash_password_async,
+    needs_rehash,
+    shutdown_password_pool,
+    verify_password_async,
+)
+from utils.skill_utils import get_screen_mode, match_skills, should_skip_llm
+from utils.executor_utils import (
+    get_executor_stats,
+    initialize_executors,
+    run_in_executor,
+    shutdown_executors,
+)
+from mongodb.mongodb_blobs import open_blob, put_blob
+from mongodb.mongodb_cache import resolution_cache_stats
+from mongodb.mongodb_client import close_client, get_database, pool_stats, warm_pool
+from mongodb.mongodb_indexes import ensure_indexes, get_index_errors
+from mongodb.mongodb_jobs import build_job_doc, cancel_job, enqueue_job, fetch_job
+from mongodb.mongodb_rescore import create_rescore_job, get_rescore_job, run_rescore_job
+from mongodb.mongodb_db import backfill_search_terms, initialize_mongodb
+from mongodb.mongodb_async import (
+    fetch_analysis_history_page,
+    fetch_analysis_record,
+    fetch_analysis_stats,
     fetch_client_names,
     fetch_client_details_by_jd,
     fetch_jd_names_for_client,
+    find_client,
+    find_jd,
     store_results_in_mongodb,
     update_job_description,
 )
@@ -45,10 +91,7 @@ load_dotenv()
 # --------------------
 # Environment / Clients
 # --------------------
-MONGO_URI = os.getenv("MONGO_URI")
-MONGO_DB = os.getenv("MONGO_DB")
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB]
+db = get_database()
 col_super_admins = db["super_admins"]
 col_companies = db["companies"]
 col_company_users = db["company_users"]
@@ -61,9 +104,13 @@ SMTP_PASS = os.getenv("SMTP_PASS")
 SMTP_FROM = os.getenv("SMTP_FROM") or SMTP_USER
 APP_BASE_URL = os.getenv("APP_BASE_URL", "http://127.0.0.1:8000")
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+BATCH_MAX_FILES = get_env_int("BATCH_MAX_FILES", 200)
 
 app = FastAPI()
 
+# Request ids, per-stage spans, slow-request log and optional profiling
+app.add_middleware(TracingMiddleware)
+
 # Allow frontend to talk to backend
 app.add_middleware(
     CORSMiddleware,
@@ -221,12 +268,33 @@ def send_reset_email(to_email: str, token: str):
 # --------------------
 # Auth
 # --------------------
+async def _rehash_if_needed(collection, user: dict, password: str) -> None:
+    # BCRYPT_ROUNDS changed since this hash was made: store one at the new cost
+    if not needs_rehash(user["password"]):
+        return
+    try:
+        with span("password_rehash"):
+            new_hash = await hash_password_async(password)
+            # Matching the old hash skips the write if the password changed meanwhile
+            await run_in_executor("db", collection.update_one,
+                                  {"email": user["email"], "password": user["password"]},
+                                  {"$set": {"password": new_hash}})
+    except Exception as e:
+        # The login itself succeeded; try again next time
+        print(f"Password rehash failed for {user.get('email')}: {e}")
+
+
 @app.post("/login")
 
-def login(data: LoginRequest):
+async def login(data: LoginRequest):
+    # Async so bcrypt waits in the password pool without holding a request thread
     # Super admin
-    sa = col_super_admins.find_one({"email": data.email})
-    if sa and bcrypt.checkpw(data.password.encode("utf-8"), sa["password"].encode("utf-8")):
+    with span("super_admin_lookup"):
+        sa = await run_in_executor("db", col_super_admins.find_one, {"email": data.email})
+    with span("password_check"):
+        sa_ok = bool(sa) and await verify_password_async(data.password, sa["password"])
+    if sa_ok:
+        await _rehash_if_needed(col_super_admins, sa, data.password)
         return {
             "message": "Login successful",
             "role": "super_admin",
@@ -237,8 +305,12 @@ def login(data: LoginRequest):
         }
 
     # Company users
-    cu = col_company_users.find_one({"email": data.email})
-    if cu and bcrypt.checkpw(data.password.encode("utf-8"), cu["password"].encode("utf-8")):
+    with span("company_user_lookup"):
+        cu = await run_in_executor("db", col_company_users.find_one, {"email": data.email})
+    with span("password_check"):
+        cu_ok = bool(cu) and await verify_password_async(data.password, cu["password"])
+    if cu_ok:
+        await _rehash_if_needed(col_company_users, cu, data.password)
         return {
             "message": "Login successful",
             "role": cu.get("role"),
@@ -257,13 +329,17 @@ def login(data: LoginRequest):
 # --------------------
 @app.post("/companies", response_model=CompanyResponse)
 
-def create_company(company: CompanyCreate, _: str = Depends(require_super_admin)):
+async def create_company(company: CompanyCreate, _: str = Depends(require_super_admin)):
+    # Async like login: bcrypt waits in the password pool, Mongo on the db pool
     # Duplicate checks
-    if col_companies.find_one({"name": company.name}):
+    if await run_in_executor("db", col_companies.find_one, {"name": company.name}):
         raise HTTPException(status_code=400, detail="Company name already exists")
-    if col_company_users.find_one({"email": company.admin_email}):
+    if await run_in_executor("db", col_company_users.find_one, {"email": company.admin_email}):
         raise HTTPException(status_code=400, detail="Admin email already exists")
 
+    # Hash first: a 503 from a full password pool must not leave a company without its admin
+    admin_password_hash = await hash_password_async(company.admin_password)
+
     now_iso = datetime.now().isoformat()
     company_id = str(uuid.uuid4())
     company_doc = {
@@ -274,7 +350,7 @@ def create_company(company: CompanyCreate, _: str = Depends(require_super_admin)
         "address": company.address,
         "created_at": now_iso
     }
-    col_companies.insert_one(company_doc)
+    await run_in_executor("db", col_companies.insert_one, company_doc)
 
     # Initial company admin
     admin_id = str(uuid.uuid4())
@@ -282,14 +358,14 @@ def create_company(company: CompanyCreate, _: str = Depends(require_super_admin)
         "_id": admin_id,
         "id": admin_id,
         "email": company.admin_email,
-        "password": bcrypt.hashpw(company.admin_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8"),
+        "password": admin_password_hash,
         "name": company.name,
         "role": "company_admin",
         "company_id": company_id,
         "created_at": now_iso
     }
     try:
-        col_company_users.insert_one(admin_doc)
+        await run_in_executor("db", col_company_users.insert_one, admin_doc)
     except Exception as e:
         # Keep company, but surface in logs
         print("Failed to create company admin:", str(e))
@@ -337,7 +413,7 @@ def delete_company(company_id: str, _: str = Depends(require_super_admin)):
 # --------------------
 @app.post("/users", response_model=UserResponse)
 
-def create_user(user: UserCreate, _: str = Depends(require_super_admin)):
+async def create_user(user: UserCreate, _: str = Depends(require_super_admin)):
     try:
         now_iso = datetime.now().isoformat()
         user_id = str(uuid.uuid4())
@@ -345,28 +421,33 @@ def create_user(user: UserCreate, _: str = Depends(require_super_admin)):
             "_id": user_id,
             "id": user_id,
             "email": user.email,
-            "password": bcrypt.hashpw(user.password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8"),
+            "password": await hash_password_async(user.password),
             "name": user.name,
             "role": "user",
             "company_id": user.company_id,
             "created_at": now_iso
         }
-        col_company_users.insert_one(user_doc)
+        await run_in_executor("db", col_company_users.insert_one, user_doc)
         return UserResponse(**{k: v for k, v in user_doc.items() if k != "_id"})
+    except ProviderUnavailable:
+        # Password pool saturated: 503 with Retry-After, not a 500
+        raise
     except Exception as e:
         print("Error in create_user:", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.patch("/users/{user_id}", response_model=UserResponse)
 
-def update_user(user_id: str, user: UserUpdate, _: str = Depends(require_super_admin)):
+async def update_user(user_id: str, user: UserUpdate, _: str = Depends(require_super_admin)):
     update_data = {k: v for k, v in user.dict(exclude_unset=True).items() if v is not None}
     if "password" in update_data:
-        update_data["password"] = bcrypt.hashpw(update_data["password"].encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        update_data["password"] = await hash_password_async(update_data["password"])
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    updated = col_company_users.find_one_and_update(
+    updated = await run_in_executor(
+        "db",
+        col_company_users.find_one_and_update,
         {"id": user_id},
         {"$set": update_data},
         return_document=ReturnDocument.AFTER
@@ -423,19 +504,21 @@ def _find_user_by_email(email: str):
 
 @app.post("/password-reset/request")
 
-def password_reset_request(data: PasswordResetRequest):
+async def password_reset_request(data: PasswordResetRequest):
+    # Unauthenticated, so it must not tie up request threads on bcrypt or SMTP
     if not data.email or not data.new_password:
         raise HTTPException(status_code=400, detail="Email and new password are required")
     if len(data.new_password) < 6:
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
 
-    table, user = _find_user_by_email(data.email)
+    table, user = await run_in_executor("db", _find_user_by_email, data.email)
     if not user:
         raise HTTPException(status_code=404, detail="Email not found")
 
     token = str(uuid.uuid4())
-    expires_at = (datetime.utcnow() + timedelta(minutes=1)).isoformat() + "Z"
-    hashed_new_password = bcrypt.hashpw(data.new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    expire_at = datetime.utcnow() + timedelta(minutes=1)
+    expires_at = expire_at.isoformat() + "Z"
+    hashed_new_password = await hash_password_async(data.new_password)
 
     row_id = str(uuid.uuid4())
     reset_row = {
@@ -446,13 +529,14 @@ def password_reset_request(data: PasswordResetRequest):
         "new_password_hash": hashed_new_password,
         "user_table": table,
         "expires_at": expires_at,
+        "expire_at": expire_at,  # BSON date for the TTL index
         "created_at": datetime.utcnow().isoformat()
     }
 
-    col_password_resets.insert_one(reset_row)
+    await run_in_executor("db", col_password_resets.insert_one, reset_row)
 
     try:
-        send_reset_email(data.email, token)
+        await run_in_executor("db", send_reset_email, data.email, token)
     except Exception as e:
         print("Failed to send email:", str(e))
         msg = "Failed to send reset email"
@@ -536,10 +620,24 @@ templates = Jinja2Templates(directory="templates")
 @app.on_event("startup")
 def on_startup():
     _ensure_env_loaded()
+    initialize_executors()
+    get_parse_cache()
+    initialize_llama_parser_pool()
     # Initialize Supabase client (module import also initializes it)
     try:
         #initialize_supabase()
         initialize_mongodb()
+        warm_pool()
+        if os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true":
+            for row in ensure_indexes(db):
+                if row.get("error"):
+                    print(f"Index on {row['collection']} {row['keys']} not created: {row['error']}"
+                          " (run python -m mongodb.mongodb_indexes --dedupe if it is a unique index)")
+            # Analyses stored before search_terms existed are invisible to ?q= until
+            # backfilled; only rows missing the field are touched, so this is cheap once done
+            backfilled = backfill_search_terms(db)
+            if backfilled:
+                print(f"Backfilled search_terms on {backfilled} analyses")
     except Exception:
         # Defer errors to first DB call
         pass
@@ -551,9 +649,76 @@ def on_startup():
         print(f"Gemini not initialized: {e}")
 
 
+@app.on_event("startup")
+async def start_job_workers():
+    app.state.job_pool = None
+    if get_env_int("JOB_WORKERS", 4) <= 0:
+        return
+    try:
+        app.state.job_pool = create_job_worker_pool(_process_analysis_job)
+        await app.state.job_pool.start()
+    except Exception as e:
+        app.state.job_pool = None
+        print(f"Analysis job workers not started: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    if getattr(app.state, "job_pool", None):
+        await app.state.job_pool.stop()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_executors()
+    shutdown_password_pool()
+    close_client()
+
+
+@app.exception_handler(ProviderUnavailable)
+async def provider_unavailable_handler(request: Request, exc: ProviderUnavailable) -> JSONResponse:
+    # The governor refused the call: tell the client when to come back
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after + 0.999))},
+    )
+
+
 @app.get("/health")
 def health() -> Dict[str, Any]:
-    return {"ok": True, "gemini": bool(app.state.__dict__.get("gemini_model"))}
+    return {
+        "ok": True,
+        "gemini": bool(app.state.__dict__.get("gemini_model")),
+        "executors": get_executor_stats(),
+        "mongo_pool": pool_stats(),
+        "parse_cache": get_parse_cache().stats(),
+        "parse_paths": get_parse_stats(),
+        "analysis_cache": get_analysis_cache().stats(),
+        "resolution_cache": resolution_cache_stats(),
+        "gemini_usage": get_token_usage_stats(),
+        "gemini_output": get_output_stats(),
+        "governors": get_governor_stats(),
+        "password_pool": get_password_pool_stats(),
+        "analysis_jobs": app.state.job_pool.stats() if getattr(app.state, "job_pool", None) else None,
+        # Non-empty when e.g. the unique clients/JD indexes couldn't be built over duplicates
+        "index_errors": get_index_errors(),
+    }
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    # Set the header directly: media_type would get a second charset appended
+    return Response(content=render_metrics(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+@app.get("/debug/profiles/{request_id}", response_class=HTMLResponse)
+def get_request_profile(request_id: str, _: str = Depends(require_super_admin)):
+    """pyinstrument report of a profiled request (see PROFILING_ENABLED)."""
+    path = get_profile_path(request_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    with open(path, "r", encoding="utf-8") as f:
+        return HTMLResponse(f.read())
 
 # Add this dependency to extract user info from the token
 def get_current_user(request: Request, 
@@ -582,10 +747,81 @@ def get_current_user(request: Request,
         "company_id": x_company_id
     }
 
+def _parse_uploaded_resume(filename: str, content: bytes, resume_sha256: Optional[str] = None) -> str:
+    """
+    Write an uploaded resume to a temp file and extract its text.
+    :param filename: Original upload name (used for the extension)
+    :param content: Raw file bytes
+    :param resume_sha256: Precomputed hash of content, if the caller has one
+    :return: Resume text
+    """
+    # Same bytes always give the same text, so skip the cloud parse on repeats
+    parse_cache = get_parse_cache()
+    resume_sha256 = resume_sha256 or hash_content(content)
+    cached = parse_cache.get(resume_sha256)
+    if cached:
+        record_cache_hit("parse")
+        return cached["text"]
+
+    with observe_stage("temp_write"):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp:
+            tmp.write(content)
+            tmp_path = tmp.name
+
+    try:
+        # PARSE_MODE decides between LlamaParse-first and local-first extraction
+        resume_text, source = parse_resume_file(tmp_path)
+        if resume_text:
+            parse_cache.put(resume_sha256, resume_text, source)
+        return resume_text
+    finally:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+
+
+def _get_gemini_model():
+    model = app.state.__dict__.get("gemini_model")
+    if model is None:
+        model = initialize_gemini()
+        app.state.gemini_model = model
+    return model
+
+
+def _analyze_resume(resume_text: str, resume_sha256: str, jd_dict: Dict[str, Any],
+                    company_id: str, bypass_cache: bool = False,
+                    screen_mode: str = "off") -> Dict[str, Any]:
+    """
+    Run the Gemini analysis, reusing a cached result for the same resume
+    bytes and an equivalent JD unless bypass_cache is set. In "fast" screen
+    mode, or in "prefilter" mode for clearly non-matching resumes, only the
+    local skill matcher runs.
+    """
+    if screen_mode != "off":
+        skill_analysis = match_skills(resume_text, jd_dict)
+        if screen_mode == "fast" or should_skip_llm(skill_analysis, jd_dict):
+            return build_fast_screen_analysis(resume_text, skill_analysis, prefiltered=screen_mode == "prefilter")
+
+    analysis_cache = get_analysis_cache()
+    if not bypass_cache:
+        cached = analysis_cache.get(company_id, resume_sha256, jd_dict)
+        if cached is not None:
+            record_cache_hit("analysis")
+            return cached
+
+    analysis = analyze_resume_comprehensive(resume_text, jd_dict, _get_gemini_model())
+    analysis_cache.put(company_id, resume_sha256, jd_dict, analysis)
+    return analysis
+
+
 @app.post("/analyze")
 async def analyze_resume_endpoint(
     resume: UploadFile = File(..., description="Resume file (.pdf or .docx)"),
     jd_data: str = Form(..., description="JSON string for JDData"),
+    bypass_cache: bool = Form(False, description="Re-run Gemini even if a cached analysis exists"),
+    screen_mode: Optional[str] = Form(None, description="off | prefilter | fast (default: SKILL_SCREEN_MODE)"),
+    background: bool = Form(False, description="Queue the analysis and return 202 with a job to poll"),
     current_user: dict = Depends(get_current_user)
 ) -> JSONResponse:
     
@@ -593,45 +829,51 @@ async def analyze_resume_endpoint(
         jd: JDData = JDData(**json.loads(jd_data))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid jd_data JSON: {e}")
-
-    # Read file content
-    content = await resume.read()
-
-    # Save uploaded file to a temp path for parsing
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(resume.filename)[1]) as tmp:
-        tmp.write(content)
-        tmp_path = tmp.name
-
     try:
-        # Parse resume using LlamaParse (json first, fallback to text)
-        resume_text = ""
-        try:
-            parser_json = initialize_llama_parser("json")
-            resume_text = parse_resume(tmp_path, parser_json)
-        except Exception:
-            parser_text = initialize_llama_parser("text")
-            resume_text = parse_resume(tmp_path, parser_text)
+        screen_mode = get_screen_mode(screen_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    set_metrics_company(current_user.get("company_id"))
+    # Read file content
+    with observe_stage("upload_read"):
+        content = await resume.read()
+    resume_sha256 = hash_content(content)
+
+    if background:
+        return await _enqueue_analysis(resume.filename, content, resume_sha256, jd.dict(),
+                                       bypass_cache, screen_mode, current_user)
+
+    with ANALYSES_IN_FLIGHT.track_inprogress():
+        # Blocking stages run on their own sized pools so the event loop stays free
+        # (the parse/analyze spans include time queued for a worker)
+        with span("parse"):
+            resume_text = await run_in_executor("parse", _parse_uploaded_resume, resume.filename, content, resume_sha256)
         if not resume_text:
             raise HTTPException(status_code=422, detail="Failed to parse resume text")
 
         # Analyze with Gemini
-        model = app.state.__dict__.get("gemini_model")
-        if model is None:
-            model = initialize_gemini()
-            app.state.gemini_model = model
-
-        analysis = analyze_resume_comprehensive(resume_text, jd.dict(), model)
+        with span("analyze"):
+            analysis = await run_in_executor(
+                "llm",
+                _analyze_resume,
+                resume_text,
+                resume_sha256,
+                jd.dict(),
+                current_user.get("company_id") or "",
+                bypass_cache,
+                screen_mode,
+            )
 
         # Validate current_user data before storing
         if not current_user.get("id"):
             raise HTTPException(status_code=400, detail="User ID not found in authentication")
-        
+    
         if not current_user.get("company_id"):
             raise HTTPException(status_code=400, detail="Company ID not found in authentication")
 
         # Store in MongoDB with file
-        store_key = store_results_in_mongodb(
+        store_key = await store_results_in_mongodb(
             analysis,
             jd.dict(),
             resume.filename,
@@ -643,18 +885,343 @@ async def analyze_resume_endpoint(
             current_user["company_id"]  # company_id
         )
 
-        return JSONResponse(
-            status_code=200,
-            content={
-                "analysis_id": store_key,
-                "analysis": analysis,
-            },
-        )
-    finally:
+    return JSONResponse(
+        status_code=200,
+        content={
+            "analysis_id": store_key,
+            "analysis": analysis,
+        },
+    )
+
+
+_stream_producers: Set[asyncio.Future] = set()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _analysis_events(filename: str, content: bytes, resume_sha256: str, jd_dict: Dict[str, Any],
+                           bypass_cache: bool, screen_mode: str, min_match_score: Optional[int],
+                           current_user: dict):
+    """
+    Event stream behind /analyze/stream: the same stages as /analyze, with
+    an event as each one finishes and Gemini's output forwarded section by
+    section while it is generated.
+    """
+    set_metrics_company(current_user["company_id"])
+    with ANALYSES_IN_FLIGHT.track_inprogress():
+        async for event in _analysis_stages(filename, content, resume_sha256, jd_dict,
+                                            bypass_cache, screen_mode, min_match_score, current_user):
+            yield event
+
+
+async def _analysis_stages(filename: str, content: bytes, resume_sha256: str, jd_dict: Dict[str, Any],
+                           bypass_cache: bool, screen_mode: str, min_match_score: Optional[int],
+                           current_user: dict):
+    yield _sse("uploaded", {"filename": filename, "size": len(content), "sha256": resume_sha256})
+
+    try:
+        resume_text = await run_in_executor("parse", _parse_uploaded_resume, filename, content, resume_sha256)
+    except Exception as e:
+        yield _sse("error", {"stage": "parse", "detail": str(e)})
+        return
+    if not resume_text:
+        yield _sse("error", {"stage": "parse", "detail": "Failed to parse resume text"})
+        return
+    yield _sse("parsed", {"chars": len(resume_text)})
+
+    # The local skill screen is cheap and gives the UI a first score right away
+    skill_analysis = match_skills(resume_text, jd_dict)
+    yield _sse("skill_screen", skill_analysis)
+
+    company_id = current_user["company_id"]
+    analysis_cache = get_analysis_cache()
+    analysis = None
+    if screen_mode == "fast" or (screen_mode == "prefilter" and should_skip_llm(skill_analysis, jd_dict)):
+        analysis = build_fast_screen_analysis(resume_text, skill_analysis, prefiltered=screen_mode == "prefilter")
+    elif not bypass_cache:
+        analysis = analysis_cache.get(company_id, resume_sha256, jd_dict)
+        if analysis is not None:
+            record_cache_hit("analysis")
+
+    if analysis is None:
+        yield _sse("llm_started", {})
+        # The Gemini stream is a blocking iterator: drain it on the llm pool
+        # and hand events back to the loop through a queue
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce() -> None:
+            try:
+                for event in iter_resume_analysis(resume_text, jd_dict, _get_gemini_model()):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, ("error", str(e)))
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        # Runs to completion in the background even if this stream is closed early
+        producer = asyncio.ensure_future(run_in_executor("llm", produce))
+        _stream_producers.add(producer)
+        producer.add_done_callback(_stream_producers.discard)
         try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                if event[0] == "error":
+                    yield _sse("error", {"stage": "llm", "detail": event[1]})
+                    return
+                if event[0] == "result":
+                    analysis = event[1]
+                    continue
+                _, field, value = event
+                yield _sse("partial", {"field": field, "data": value})
+                if (field == "skill_analysis" and min_match_score is not None
+                        and isinstance(value, dict) and value.get("match_score", 0) < min_match_score):
+                    yield _sse("cancelled", {
+                        "reason": f"match_score {value.get('match_score', 0)} below min_match_score {min_match_score}",
+                    })
+                    return
+        finally:
+            # Also reached when the client disconnects: stop reading from Gemini
+            stop.set()
+        if analysis is None:
+            return
+        analysis_cache.put(company_id, resume_sha256, jd_dict, analysis)
+
+    yield _sse("analysis", {"analysis": analysis})
+    try:
+        analysis_id = await store_results_in_mongodb(
+            analysis,
+            jd_dict,
+            filename,
+            resume_text,
+            content,
+            jd_dict["client_name"],
+            jd_dict["jd_title"],
+            current_user["id"],
+            company_id
+        )
+    except Exception as e:
+        yield _sse("error", {"stage": "store", "detail": str(e)})
+        return
+    yield _sse("stored", {"analysis_id": analysis_id})
+
+
+@app.post("/analyze/stream")
+async def analyze_resume_stream(
+    resume: UploadFile = File(..., description="Resume file (.pdf or .docx)"),
+    jd_data: str = Form(..., description="JSON string for JDData"),
+    bypass_cache: bool = Form(False, description="Re-run Gemini even if a cached analysis exists"),
+    screen_mode: Optional[str] = Form(None, description="off | prefilter | fast (default: SKILL_SCREEN_MODE)"),
+    min_match_score: Optional[int] = Form(None, description="Stop (and don't store) when Gemini's match_score is below this"),
+    current_user: dict = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Server-Sent Events version of /analyze. Events: uploaded, parsed,
+    skill_screen, llm_started, partial (one per finished section of the
+    Gemini output), analysis, stored; cancelled or error end the stream early.
+    """
+    try:
+        jd: JDData = JDData(**json.loads(jd_data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid jd_data JSON: {e}")
+    try:
+        screen_mode = get_screen_mode(screen_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not current_user.get("id"):
+        raise HTTPException(status_code=400, detail="User ID not found in authentication")
+    if not current_user.get("company_id"):
+        raise HTTPException(status_code=400, detail="Company ID not found in authentication")
+
+    set_metrics_company(current_user["company_id"])
+    with observe_stage("upload_read"):
+        content = await resume.read()
+    return StreamingResponse(
+        _analysis_events(resume.filename, content, hash_content(content), jd.dict(),
+                         bypass_cache, screen_mode, min_match_score, current_user),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _enqueue_analysis(filename: str, content: bytes, resume_sha256: str, jd_dict: Dict[str, Any],
+                            bypass_cache: bool, screen_mode: str, current_user: dict) -> JSONResponse:
+    """
+    Persist the upload and queue it for the job workers. Re-submitting the
+    same resume for the same JD while it is still queued/running returns
+    the existing job.
+    """
+    if not current_user.get("id"):
+        raise HTTPException(status_code=400, detail="User ID not found in authentication")
+    if not current_user.get("company_id"):
+        raise HTTPException(status_code=400, detail="Company ID not found in authentication")
+    job_pool = getattr(app.state, "job_pool", None)
+    if job_pool is None:
+        raise HTTPException(status_code=503, detail="Background analysis is not available")
+
+    company_id = current_user["company_id"]
+    file_ref = await run_in_executor("db", put_blob, db, content, filename, resume_sha256)
+    active_key = f"{company_id}:{current_user['id']}:{screen_mode}:{make_analysis_key(company_id, resume_sha256, jd_dict)}"
+    job = await enqueue_job(build_job_doc(
+        company_id,
+        current_user["id"],
+        filename,
+        file_ref,
+        jd_dict,
+        {"bypass_cache": bypass_cache, "screen_mode": screen_mode},
+        active_key,
+    ))
+    job_pool.notify()
+
+    status_url = f"/jobs/{job['job_id']}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job["job_id"], "status": job["status"], "status_url": status_url},
+        headers={"Location": status_url},
+    )
+
+
+async def _process_analysis_job(job: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """Worker side of a queued /analyze: parse, analyze, store."""
+    set_metrics_company(job["company_id"])
+    with ANALYSES_IN_FLIGHT.track_inprogress():
+        return await _run_analysis_job(job, ctx)
+
+
+async def _run_analysis_job(job: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    def read_blob() -> bytes:
+        with open_blob(db, job["file_ref"]) as fileobj:
+            return fileobj.read()
+
+    content = await run_in_executor("db", read_blob)
+    resume_sha256 = job["file_ref"]["sha256"]
+    resume_text = await run_in_executor("parse", _parse_uploaded_resume, job["filename"], content, resume_sha256)
+    if not resume_text:
+        raise Exception("Failed to parse resume text")
+    await ctx.checkpoint()
+
+    jd_dict = job["jd_data"]
+    options = job.get("options") or {}
+    analysis = await run_in_executor(
+        "llm",
+        _analyze_resume,
+        resume_text,
+        resume_sha256,
+        jd_dict,
+        job["company_id"],
+        options.get("bypass_cache", False),
+        options.get("screen_mode", "off"),
+    )
+    await ctx.checkpoint()
+
+    analysis_id = await store_results_in_mongodb(
+        analysis,
+        jd_dict,
+        job["filename"],
+        resume_text,
+        content,
+        jd_dict["client_name"],
+        jd_dict["jd_title"],
+        job["created_by"],
+        job["company_id"]
+    )
+    return {"analysis_id": analysis_id, "analysis": analysis}
+
+
+@app.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    job = await fetch_job(job_id, current_user["company_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_analysis_job(job_id: str, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    """Cancel a queued job; a running one stops at its next stage boundary."""
+    job = await cancel_job(job_id, current_user["company_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/analyze/batch")
+async def analyze_batch_endpoint(
+    resumes: List[UploadFile] = File(..., description="Resume files (.pdf or .docx)"),
+    jd_data: str = Form(..., description="JSON string for JDData"),
+    bypass_cache: bool = Form(False, description="Re-run Gemini even if a cached analysis exists"),
+    screen_mode: Optional[str] = Form(None, description="off | prefilter | fast (default: SKILL_SCREEN_MODE)"),
+    current_user: dict = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Screen many resumes against one JD. Parse, analysis and store run as
+    pipelined stages (sizes from BATCH_PARSE/ANALYZE/STORE_CONCURRENCY) and
+    each file's result is streamed back as one NDJSON line when it finishes.
+    """
+    try:
+        jd: JDData = JDData(**json.loads(jd_data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid jd_data JSON: {e}")
+    try:
+        screen_mode = get_screen_mode(screen_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not resumes:
+        raise HTTPException(status_code=400, detail="No resume files uploaded")
+    if len(resumes) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files (max {BATCH_MAX_FILES})")
+
+    if not current_user.get("id"):
+        raise HTTPException(status_code=400, detail="User ID not found in authentication")
+    if not current_user.get("company_id"):
+        raise HTTPException(status_code=400, detail="Company ID not found in authentication")
+
+    set_metrics_company(current_user["company_id"])
+    with observe_stage("upload_read"):
+        files = [(resume.filename, await resume.read()) for resume in resumes]
+    jd_dict = jd.dict()
+
+    def analyze(filename: str, content: bytes, resume_text: str) -> Dict[str, Any]:
+        return _analyze_resume(
+            resume_text, hash_content(content), jd_dict, current_user["company_id"], bypass_cache, screen_mode
+        )
+
+    async def store(filename: str, content: bytes, resume_text: str, analysis: Dict[str, Any]) -> str:
+        return await store_results_in_mongodb(
+            analysis,
+            jd_dict,
+            filename,
+            resume_text,
+            content,
+            jd.client_name,
+            jd.jd_title,
+            current_user["id"],
+            current_user["company_id"]
+        )
+
+    async def stream_results():
+        set_metrics_company(current_user["company_id"])
+        async for result in run_resume_pipeline(
+            files,
+            _parse_uploaded_resume,
+            analyze,
+            store,
+            parse_concurrency=get_stage_concurrency("parse", 4),
+            analyze_concurrency=get_stage_concurrency("analyze", 8),
+            store_concurrency=get_stage_concurrency("store", 4),
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 # @app.get("/history")
 # def list_history() -> List[Dict[str, Any]]:
@@ -665,18 +1232,99 @@ async def analyze_resume_endpoint(
 # def list_clients() -> List[str]:
 #     return fetch_client_names()
 @app.get("/history")
-def list_history(current_user: dict = Depends(get_current_user)) -> List[Dict[str, Any]]:
-    return fetch_analysis_history(current_user)
+async def list_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    client_name: Optional[str] = None,
+    jd_title: Optional[str] = None,
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    max_score: Optional[int] = Query(None, ge=0, le=100),
+    experience_match: Optional[bool] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    q: Optional[str] = Query(None, description="Prefix search on the words of candidate name, email, client or JD (\"dev\" matches \"Backend Developer\", \"end\" does not)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    include_total: bool = False,
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    filters = {
+        "client_name": client_name,
+        "jd_title": jd_title,
+        "min_score": min_score,
+        "max_score": max_score,
+        "experience_match": experience_match,
+        "date_from": date_from,
+        "date_to": date_to,
+        "q": q,
+    }
+    try:
+        return await fetch_analysis_history_page(
+            current_user,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/stats")
+async def get_stats(current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    """Dashboard counters, per-client/JD breakdowns and a score histogram."""
+    return await fetch_analysis_stats(current_user)
+
+
+DOWNLOAD_CHUNK_SIZE = 255 * 1024
+
+
+def _parse_range_header(range_header: Optional[str], size: int) -> Optional[tuple]:
+    """
+    Parse a single 'bytes=start-end' range.
+    :return: (start, end) inclusive, or None to send the whole file
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_str, _, end_str = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_str == "":
+            # Suffix range: last N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Invalid Range header",
+                            headers={"Content-Range": f"bytes */{size}"})
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(fileobj, start: int, end: int):
+    try:
+        fileobj.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fileobj.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
 
 
 @app.get("/download/{analysis_id}")
-async def download_resume(analysis_id: str, current_user: dict = Depends(get_current_user)):
+async def download_resume(analysis_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     try:
         # Get analysis record
-        analysis = db.analysis_history.find_one({
-            "analysis_id": analysis_id,
-            "company_id": current_user["company_id"]
-        })
+        analysis = await fetch_analysis_record(analysis_id, current_user["company_id"])
         
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
@@ -685,24 +1333,43 @@ async def download_resume(analysis_id: str, current_user: dict = Depends(get_cur
         if current_user["role"] != "company_admin" and analysis["created_by"] != current_user["id"]:
             raise HTTPException(status_code=403, detail="Not authorized to access this resource")
         
-        # Get file content from BSON Binary
-        file_content = analysis["file_content"]
-        
-        # Return file as download
+        if analysis.get("file_ref"):
+            fileobj = await run_in_executor("db", open_blob, db, analysis["file_ref"])
+            size = analysis["file_ref"]["length"]
+        else:
+            # Records stored before blobs moved out of analysis_history
+            fileobj = BytesIO(analysis["file_content"])
+            size = len(analysis["file_content"])
+
+        headers = {
+            "Content-Disposition": f"attachment; filename={analysis['filename']}",
+            "Accept-Ranges": "bytes",
+        }
+        byte_range = _parse_range_header(request.headers.get("range"), size)
+        status_code = 200
+        start, end = 0, size - 1
+        if byte_range:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+        # Sync generator: Starlette reads the chunks in its threadpool
         return StreamingResponse(
-            BytesIO(file_content),
+            _iter_file_range(fileobj, start, end),
+            status_code=status_code,
             media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": f"attachment; filename={analysis['filename']}"
-            }
+            headers=headers,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
 
 # Update the clients endpoint
 @app.get("/clients")
-def list_clients(current_user: dict = Depends(get_current_user)) -> List[str]:
-    return fetch_client_names(current_user["company_id"])
+async def list_clients(current_user: dict = Depends(get_current_user)) -> List[str]:
+    return await fetch_client_names(current_user["company_id"])
 
 # @app.get("/clients/{client_name}/jds")
 # def list_jd_names(client_name: str) -> List[str]:
@@ -731,20 +1398,20 @@ def list_clients(current_user: dict = Depends(get_current_user)) -> List[str]:
 #         raise HTTPException(status_code=400, detail="Failed to update job description")
 #     return {"ok": True}
 @app.get("/clients/{client_name}/jds")
-def list_jd_names(client_name: str, current_user: dict = Depends(get_current_user)) -> List[str]:
-    jd_names = fetch_jd_names_for_client(client_name, current_user["company_id"])
+async def list_jd_names(client_name: str, current_user: dict = Depends(get_current_user)) -> List[str]:
+    jd_names = await fetch_jd_names_for_client(client_name, current_user["company_id"])
     return jd_names or []
 
 @app.get("/clients/{client_name}/jds/{jd_title}")
-def get_jd_details(client_name: str, jd_title: str, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
-    jd = fetch_client_details_by_jd(client_name, jd_title, current_user["company_id"])
+async def get_jd_details(client_name: str, jd_title: str, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    jd = await fetch_client_details_by_jd(client_name, jd_title, current_user["company_id"])
     if not jd:
         raise HTTPException(status_code=404, detail="JD not found")
     return jd
 
 @app.put("/clients/{client_name}/jds/{jd_title}")
-def put_update_jd(client_name: str, jd_title: str, body: UpdateJD, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
-    success = update_job_description(
+async def put_update_jd(client_name: str, jd_title: str, body: UpdateJD, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    success = await update_job_description(
         client_name,
         jd_title,
         body.required_experience,
@@ -754,7 +1421,51 @@ def put_update_jd(client_name: str, jd_title: str, body: UpdateJD, current_user:
     )
     if not success:
         raise HTTPException(status_code=400, detail="Failed to update job description")
-    return {"ok": True}
+    # Cached analyses were scored against the old skills/experience
+    get_analysis_cache().invalidate_jd(current_user["company_id"], client_name, jd_title)
+    job = await _start_rescore(client_name, jd_title, current_user["company_id"])
+    return {"ok": True, "rescore_job_id": job["job_id"] if job else None}
+
+
+_rescore_tasks: Set[asyncio.Task] = set()
+
+
+def _cached_resume_text(sha256: str) -> Optional[str]:
+    entry = get_parse_cache().get(sha256)
+    return entry["text"] if entry else None
+
+
+async def _start_rescore(client_name: str, jd_title: str, company_id: str) -> Optional[Dict[str, Any]]:
+    """Re-score the JD's stored analyses in the background on the db pool."""
+    client_doc = await find_client(client_name, company_id)
+    jd_doc = await find_jd(client_doc["_id"], jd_title, company_id) if client_doc else None
+    if not jd_doc:
+        return None
+    job = await run_in_executor("db", create_rescore_job, db, company_id, client_doc["client_name"], jd_doc["jd_title"])
+    task = asyncio.create_task(run_in_executor(
+        "db", run_rescore_job, job, db, jd_doc, _cached_resume_text,
+        get_env_int("RESCORE_BATCH_SIZE", 1000)
+    ))
+    _rescore_tasks.add(task)
+    task.add_done_callback(_rescore_tasks.discard)
+    return job
+
+
+@app.post("/clients/{client_name}/jds/{jd_title}/rescore", status_code=202)
+async def rescore_jd(client_name: str, jd_title: str, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    """Recompute match_score/skills/experience_match of stored analyses from the current JD."""
+    job = await _start_rescore(client_name, jd_title, current_user["company_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="JD not found")
+    return {k: v for k, v in job.items() if k not in ("_id", "company_id")}
+
+
+@app.get("/rescore/{job_id}")
+def get_rescore_status(job_id: str, current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    job = get_rescore_job(db, job_id, current_user["company_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Re-score job not found")
+    return job
 
 @app.get("/")
 def root() -> Dict[str, Any]:
@@ -763,12 +1474,20 @@ def root() -> Dict[str, Any]:
         "version": "1.0.0",
         "endpoints": [
             "GET /health",
+            "GET /metrics",
             "POST /analyze",
+            "POST /analyze/stream",
+            "POST /analyze/batch",
+            "GET /jobs/{job_id}",
+            "DELETE /jobs/{job_id}",
             "GET /history",
+            "GET /stats",
             "GET /clients",
             "GET /clients/{client_name}/jds",
             "GET /clients/{client_name}/jds/{jd_title}",
             "PUT /clients/{client_name}/jds/{jd_title}",
+            "POST /clients/{client_name}/jds/{jd_title}/rescore",
+            "GET /rescore/{job_id}",
         ],
     }
 
@@ -0,0 +1,262 @@
+import uuid
+from typing import Dict, List, Optional, Set
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from mongodb.mongodb_blobs import put_blob
+from mongodb.mongodb_cache import (
+    cache_client,
+    cache_jd,
+    cache_stats,
+    get_cached_client,
+    get_cached_jd,
+    get_cached_stats,
+    invalidate_jd,
+    invalidate_stats,
+)
+from mongodb.mongodb_client import get_async_database
+from mongodb.mongodb_db import (
+    HISTORY_SORT,
+    build_analysis_record,
+    build_history_base_query,
+    build_history_page,
+    build_history_page_query,
+    build_history_projection,
+    build_jd_details,
+    build_new_client_fields,
+    build_new_jd_fields,
+    build_stats,
+    build_stats_pipeline,
+    client_query,
+    db as sync_db,
+    jd_query,
+    serialize_history_item,
+)
+from utils.executor_utils import run_in_executor
+from utils.metrics_utils import observe_stage
+from utils.tracing_utils import span
+
+# Async (Motor) versions of the mongodb_db functions, used by the API so
+# that request handlers never block the event loop or a threadpool slot.
+# Query and document shapes are shared with mongodb_db.
+
+
+def initialize_async_mongodb():
+    # Same client and pool as mongodb_db, just the Motor side of it
+    return get_async_database()
+
+adb = initialize_async_mongodb()
+
+async def find_client(client_name: str, company_id: str) -> Optional[Dict]:
+    client_doc = get_cached_client(company_id, client_name)
+    if client_doc is None:
+        client_doc = await adb.clients.find_one(client_query(client_name, company_id))
+        if client_doc:
+            cache_client(company_id, client_doc)
+    return client_doc
+
+async def get_or_create_client(client_name: str, company_id: str, created_by: str) -> Dict:
+    client_doc = get_cached_client(company_id, client_name)
+    if client_doc is None:
+        query = client_query(client_name, company_id)
+        try:
+            client_doc = await adb.clients.find_one_and_update(
+                query,
+                {"$setOnInsert": build_new_client_fields(created_by)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost the insert race to another writer; its document is there now
+            client_doc = await adb.clients.find_one(query)
+        cache_client(company_id, client_doc)
+    return client_doc
+
+async def find_jd(client_id, jd_name: str, company_id: str) -> Optional[Dict]:
+    jd_doc = get_cached_jd(company_id, client_id, jd_name)
+    if jd_doc is None:
+        jd_doc = await adb.job_descriptions.find_one(jd_query(client_id, jd_name, company_id))
+        if jd_doc:
+            cache_jd(company_id, jd_doc)
+    return jd_doc
+
+async def get_or_create_jd(client_id, jd_name: str, jd_data: Dict, company_id: str, created_by: str) -> Dict:
+    jd_doc = get_cached_jd(company_id, client_id, jd_name)
+    if jd_doc is None:
+        query = jd_query(client_id, jd_name, company_id)
+        try:
+            jd_doc = await adb.job_descriptions.find_one_and_update(
+                query,
+                {"$setOnInsert": build_new_jd_fields(jd_data, created_by)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            jd_doc = await adb.job_descriptions.find_one(query)
+        cache_jd(company_id, jd_doc)
+    return jd_doc
+
+async def store_results_in_mongodb(analysis_data: Dict, jd_data: Dict, filename: str,
+                                   resume_text: str, file_content: bytes, client_name: str,
+                                   job_description: str, created_by: str, company_id: str) -> Optional[str]:
+    try:
+        with observe_stage("mongo_store"):
+            # Get or create client and job description
+            client_doc = await get_or_create_client(client_name, company_id, created_by)
+            jd_doc = await get_or_create_jd(client_doc["_id"], job_description, jd_data, company_id, created_by)
+
+            analysis_id = str(uuid.uuid4())
+
+            # Blob stores are synchronous (GridFS bucket / local disk)
+            file_ref = await run_in_executor("db", put_blob, sync_db, file_content, filename)
+
+            analysis_record = build_analysis_record(
+                analysis_id, analysis_data, filename, file_ref, resume_text,
+                client_doc, jd_doc, company_id, created_by
+            )
+            await adb.analysis_history.insert_one(analysis_record)
+            invalidate_stats(company_id)
+
+            return analysis_id
+
+    except Exception as e:
+        raise Exception(f"Failed to store results in MongoDB: {str(e)}")
+
+async def fetch_analysis_history(current_user: dict) -> List[Dict]:
+    try:
+        cursor = adb.analysis_history.find(
+            build_history_base_query(current_user),
+            {"file_content": 0, "file_ref": 0, "search_terms": 0}
+        ).sort("timestamp", -1)
+        return [serialize_history_item(item) async for item in cursor]
+    except Exception as e:
+        raise Exception(f"Failed to fetch history: {str(e)}")
+
+async def fetch_analysis_history_page(current_user: dict, limit: int = 50, cursor: Optional[str] = None,
+                                      filters: Optional[Dict] = None, fields: Optional[List[str]] = None,
+                                      include_total: bool = False) -> Dict:
+    try:
+        filtered_query, page_query = build_history_page_query(current_user, cursor, filters)
+        with span("history_find"):
+            items = await (
+                adb.analysis_history.find(page_query, build_history_projection(fields))
+                .sort(HISTORY_SORT)
+                .limit(limit + 1)
+                .to_list(length=limit + 1)
+            )
+        with span("history_serialize"):
+            page = build_history_page(items, limit)
+        if include_total:
+            with span("history_count"):
+                page["total"] = await adb.analysis_history.count_documents(filtered_query)
+        return page
+
+    except ValueError:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to fetch history: {str(e)}")
+
+async def fetch_analysis_stats(current_user: dict) -> Dict:
+    """
+    Dashboard stats for everything the user can see, cached briefly per
+    scope (STATS_CACHE_TTL seconds).
+    """
+    scope = build_history_base_query(current_user)
+    stats = get_cached_stats(scope)
+    if stats is not None:
+        return stats
+    try:
+        facets = await adb.analysis_history.aggregate(build_stats_pipeline(current_user)).to_list(length=1)
+        stats = build_stats(facets[0])
+    except Exception as e:
+        raise Exception(f"Failed to fetch stats: {str(e)}")
+    cache_stats(scope, stats)
+    return stats
+
+async def fetch_analysis_record(analysis_id: str, company_id: str) -> Optional[Dict]:
+    return await adb.analysis_history.find_one({
+        "analysis_id": analysis_id,
+        "company_id": company_id
+    })
+
+async def fetch_client_names(company_id: str) -> Set[str]:
+    try:
+        client_names = await adb.clients.distinct("client_name", {"company_id": company_id})
+        return set(sorted(client_names))
+    except Exception as e:
+        raise Exception(f"Failed to fetch client names: {str(e)}")
+
+async def fetch_client_details(client_name: str, company_id: str) -> Optional[Dict]:
+    try:
+        client_doc = await find_client(client_name, company_id)
+        if not client_doc:
+            return None
+
+        # Get the most recent job description for this client
+        jd_doc = await adb.job_descriptions.find_one(
+            {"client_id": client_doc["_id"], "company_id": company_id},
+            sort=[("created_at", -1)]
+        )
+        if not jd_doc:
+            return None
+
+        return build_jd_details(jd_doc)
+    except Exception as e:
+        raise Exception(f"Failed to fetch client details: {str(e)}")
+
+async def fetch_jd_names_for_client(client_name: str, company_id: str) -> Optional[List[str]]:
+    try:
+        client_doc = await find_client(client_name, company_id)
+        if not client_doc:
+            return None
+
+        jd_names = await adb.job_descriptions.distinct(
+            "jd_title",
+            {"client_id": client_doc["_id"], "company_id": company_id}
+        )
+        return jd_names if jd_names else None
+    except Exception as e:
+        raise Exception(f"Failed to fetch JD names for client: {str(e)}")
+
+async def fetch_client_details_by_jd(client_name: str, jd_name: str, company_id: str) -> Optional[Dict]:
+    try:
+        client_doc = await find_client(client_name, company_id)
+        if not client_doc:
+            return None
+
+        jd_doc = await find_jd(client_doc["_id"], jd_name, company_id)
+        if not jd_doc:
+            return None
+
+        return build_jd_details(jd_doc)
+    except Exception as e:
+        raise Exception(f"Failed to fetch client details by JD: {str(e)}")
+
+async def update_job_description(client_name: str, jd_name: str, required_experience: str,
+                                 primary_skills: list, secondary_skills: list, company_id: str) -> bool:
+    """
+    Update the job description details for a given client and JD name in MongoDB
+    """
+    try:
+        client_doc = await find_client(client_name, company_id)
+        if not client_doc:
+            return False
+
+        jd_doc = await find_jd(client_doc["_id"], jd_name, company_id)
+        if not jd_doc:
+            return False
+
+        result = await adb.job_descriptions.update_one(
+            {"_id": jd_doc["_id"]},
+            {"$set": {
+                "required_experience": required_experience,
+                "primary_skills": primary_skills,
+                "secondary_skills": secondary_skills
+            }}
+        )
+        invalidate_jd(company_id, client_doc["_id"], jd_name)
+        return result.modified_count > 0
+    except Exception as e:
+        print(f"Failed to update job description: {e}")
+        return False
@@ -0,0 +1,125 @@
+import argparse
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Dict, Optional
+
+import gridfs
+from bson import ObjectId
+
+# Resume files live outside analysis_history; documents only keep a
+# reference like {"store": "gridfs", "id": ..., "sha256": ..., "length": ...}.
+GRIDFS_BUCKET = "resume_files"
+
+
+class GridFSBlobStore:
+    name = "gridfs"
+
+    def __init__(self, database, bucket_name: str = GRIDFS_BUCKET):
+        self.bucket = gridfs.GridFSBucket(database, bucket_name=bucket_name)
+        self.files = database[f"{bucket_name}.files"]
+
+    def put(self, content: bytes, filename: str, sha256: str) -> Dict:
+        # Content-addressed: the same resume uploaded twice is stored once
+        existing = self.files.find_one({"metadata.sha256": sha256}, {"_id": 1})
+        if existing:
+            file_id = existing["_id"]
+        else:
+            file_id = self.bucket.upload_from_stream(filename, content, metadata={"sha256": sha256})
+        return {"store": self.name, "id": file_id, "sha256": sha256, "length": len(content)}
+
+    def open(self, ref: Dict) -> BinaryIO:
+        return self.bucket.open_download_stream(ObjectId(ref["id"]))
+
+
+class LocalDiskBlobStore:
+    name = "disk"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def put(self, content: bytes, filename: str, sha256: str) -> Dict:
+        path = self._path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial blob
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tmp:
+                tmp.write(content)
+            os.replace(tmp.name, path)
+        return {"store": self.name, "id": sha256, "sha256": sha256, "length": len(content)}
+
+    def open(self, ref: Dict) -> BinaryIO:
+        return open(self._path(ref["sha256"]), "rb")
+
+
+_blob_stores: Dict[str, object] = {}
+
+
+def _get_store(name: str, database):
+    if name not in _blob_stores:
+        if name == GridFSBlobStore.name:
+            _blob_stores[name] = GridFSBlobStore(database)
+        elif name == LocalDiskBlobStore.name:
+            _blob_stores[name] = LocalDiskBlobStore(os.getenv("BLOB_STORE_PATH", "resume_blobs"))
+        else:
+            raise ValueError(f"Unknown blob store: {name}")
+    return _blob_stores[name]
+
+
+def get_blob_store(database):
+    """Store used for new uploads, picked by BLOB_STORE ('gridfs' or 'disk')."""
+    return _get_store(os.getenv("BLOB_STORE", GridFSBlobStore.name).lower(), database)
+
+
+def put_blob(database, content: bytes, filename: str, sha256: Optional[str] = None) -> Dict:
+    sha256 = sha256 or hashlib.sha256(content).hexdigest()
+    return get_blob_store(database).put(content, filename, sha256)
+
+
+def open_blob(database, ref: Dict) -> BinaryIO:
+    """Open a stored blob by reference, whichever store it was written to."""
+    return _get_store(ref["store"], database).open(ref)
+
+
+def migrate_embedded_files(database, batch_size: int = 100, dry_run: bool = False) -> int:
+    """
+    Move file_content out of existing analysis_history documents into the
+    configured blob store and replace it with a file_ref.
+    :return: Number of documents migrated
+    """
+    migrated = 0
+    cursor = database.analysis_history.find(
+        {"file_content": {"$exists": True}},
+        {"file_content": 1, "filename": 1},
+        batch_size=batch_size,
+    )
+    for doc in cursor:
+        content = bytes(doc["file_content"])
+        if not dry_run:
+            ref = put_blob(database, content, doc.get("filename") or "resume")
+            database.analysis_history.update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"file_ref": ref}, "$unset": {"file_content": ""}},
+            )
+        migrated += 1
+        if migrated % batch_size == 0:
+            print(f"Migrated {migrated} documents...")
+    return migrated
+
+
+if __name__ == "__main__":
+    from mongodb.mongodb_db import db
+
+    arg_parser = argparse.ArgumentParser(description="Resume blob storage maintenance")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Move embedded file_content into the blob store")
+    migrate.add_argument("--batch-size", type=int, default=100)
+    migrate.add_argument("--dry-run", action="store_true")
+    args = arg_parser.parse_args()
+
+    if args.command == "migrate":
+        count = migrate_embedded_files(db, batch_size=args.batch_size, dry_run=args.dry_run)
+        print(f"{'Would migrate' if args.dry_run else 'Migrated'} {count} documents")
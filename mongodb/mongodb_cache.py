@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from utils.cache_utils import TTLCache
+from utils.common_utils import get_env_int, to_init_caps
+
+# In-process cache of client and job description documents, so resolving
+# (client_name, jd_title) to ids doesn't cost two round trips per analysis.
+# One LRU per tenant, sized by RESOLUTION_CACHE_MAX_PER_TENANT, with
+# entries expiring after RESOLUTION_CACHE_TTL seconds. Only documents that
+# exist are cached; misses always go to MongoDB.
+#
+# A JD edit only invalidates the cache of the process that handled it, so
+# JD entries expire sooner (RESOLUTION_CACHE_JD_TTL): other workers pick up
+# new skills within that window instead of snapshotting stale ones into
+# analysis_history. At most RESOLUTION_CACHE_MAX_TENANTS tenants are kept;
+# the least recently used one is dropped first.
+
+_tenant_caches: "OrderedDict[str, TTLCache]" = OrderedDict()
+_tenant_caches_lock = threading.Lock()
+
+
+def _tenant_cache(company_id: str) -> TTLCache:
+    with _tenant_caches_lock:
+        cache = _tenant_caches.get(company_id)
+        if cache is None:
+            cache = _tenant_caches[company_id] = TTLCache(
+                max_entries=get_env_int("RESOLUTION_CACHE_MAX_PER_TENANT", 512),
+                ttl_seconds=get_env_int("RESOLUTION_CACHE_TTL", 300),
+            )
+            while len(_tenant_caches) > max(1, get_env_int("RESOLUTION_CACHE_MAX_TENANTS", 1000)):
+                _tenant_caches.popitem(last=False)
+        else:
+            _tenant_caches.move_to_end(company_id)
+        return cache
+
+
+def _client_key(client_name: str):
+    return ("client", to_init_caps(client_name))
+
+
+def _jd_key(client_id: Any, jd_title: str):
+    return ("jd", str(client_id), to_init_caps(jd_title))
+
+
+def get_cached_client(company_id: str, client_name: str) -> Optional[Dict]:
+    return _tenant_cache(company_id).get(_client_key(client_name))
+
+
+def cache_client(company_id: str, client_doc: Dict) -> None:
+    _tenant_cache(company_id).set(_client_key(client_doc["client_name"]), client_doc)
+
+
+def get_cached_jd(company_id: str, client_id: Any, jd_title: str) -> Optional[Dict]:
+    return _tenant_cache(company_id).get(_jd_key(client_id, jd_title))
+
+
+def cache_jd(company_id: str, jd_doc: Dict) -> None:
+    _tenant_cache(company_id).set(
+        _jd_key(jd_doc["client_id"], jd_doc["jd_title"]), jd_doc,
+        ttl_seconds=get_env_int("RESOLUTION_CACHE_JD_TTL", 15),
+    )
+
+
+def invalidate_jd(company_id: str, client_id: Any, jd_title: str) -> None:
+    _tenant_cache(company_id).delete(_jd_key(client_id, jd_title))
+
+
+# Dashboard stats, keyed by the history scope (company, or company + user).
+# Short-lived: a new analysis invalidates its tenant's entries anyway.
+_stats_cache = TTLCache(
+    max_entries=get_env_int("STATS_CACHE_MAX_ENTRIES", 1024),
+    ttl_seconds=get_env_int("STATS_CACHE_TTL", 30),
+)
+
+
+def _stats_key(scope: Dict):
+    return tuple(sorted(scope.items()))
+
+
+def get_cached_stats(scope: Dict) -> Optional[Dict]:
+    return _stats_cache.get(_stats_key(scope))
+
+
+def cache_stats(scope: Dict, stats: Dict) -> None:
+    _stats_cache.set(_stats_key(scope), stats)
+
+
+def invalidate_stats(company_id: str) -> int:
+    return _stats_cache.delete_where(lambda key: ("company_id", company_id) in key)
+
+
+def resolution_cache_stats() -> Dict[str, int]:
+    with _tenant_caches_lock:
+        caches = list(_tenant_caches.values())
+    return {
+        "tenants": len(caches),
+        "entries": sum(len(cache) for cache in caches),
+        "hits": sum(cache.hits for cache in caches),
+        "misses": sum(cache.misses for cache in caches),
+    }
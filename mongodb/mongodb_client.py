@@ -0,0 +1,181 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from utils.common_utils import get_env_int
+
+# The one MongoDB connection pool for the process. Motor wraps a regular
+# pymongo MongoClient (exposed as .delegate), so async code and the sync
+# shims in mongodb_db / main.py share the same pool and monitor threads.
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events for /health."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.created = 0
+        self.closed = 0
+        self.checkout_failures = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+
+_client: Optional[AsyncIOMotorClient] = None
+_memory_client = None
+_client_lock = threading.Lock()
+_pool_listener = PoolStatsListener()
+
+
+def get_client_options() -> Dict[str, Any]:
+    """
+    Pool settings, all overridable from the environment:
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS and MONGO_SOCKET_TIMEOUT_MS.
+    """
+    return {
+        "maxPoolSize": get_env_int("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": get_env_int("MONGO_MIN_POOL_SIZE", 5),
+        "maxIdleTimeMS": get_env_int("MONGO_MAX_IDLE_TIME_MS", 300000),
+        "waitQueueTimeoutMS": get_env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000),
+        "serverSelectionTimeoutMS": get_env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": get_env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": get_env_int("MONGO_SOCKET_TIMEOUT_MS", 30000),
+    }
+
+
+def _create_memory_client():
+    """In-memory server for offline benchmarks (MONGO_BACKEND=memory), see mongodb_memory."""
+    global _memory_client
+    from mongodb.mongodb_memory import create_memory_client
+
+    _memory_client, async_client = create_memory_client()
+    return async_client
+
+
+def get_async_client() -> AsyncIOMotorClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Load .env from the project root
+            env_path = Path(__file__).parent.parent / '.env'
+            load_dotenv(dotenv_path=env_path)
+
+            if os.getenv("MONGO_BACKEND", "").lower() == "memory":
+                _client = _create_memory_client()
+                return _client
+
+            mongo_uri = os.getenv("MONGO_URI")
+            if not mongo_uri:
+                raise ValueError("MONGO_URI environment variable is not set")
+            try:
+                _client = AsyncIOMotorClient(
+                    mongo_uri,
+                    event_listeners=[_pool_listener],
+                    **get_client_options()
+                )
+            except Exception as e:
+                raise Exception(f"Failed to initialize MongoDB client: {str(e)}")
+        return _client
+
+
+def get_client():
+    """Synchronous pymongo client backed by the shared pool."""
+    client = get_async_client()
+    # The in-memory client has no .delegate; both sides share _memory_client
+    return _memory_client if _memory_client is not None else client.delegate
+
+
+def get_database():
+    return get_client()[os.getenv("MONGO_DB")]
+
+
+def get_async_database():
+    return get_async_client()[os.getenv("MONGO_DB")]
+
+
+def warm_pool() -> int:
+    """
+    Do server selection and open connections up front, so the first
+    requests after a deploy don't pay for handshakes.
+    :return: Number of concurrent pings issued
+    """
+    client = get_client()
+    connections = max(1, get_env_int("MONGO_WARM_CONNECTIONS", get_client_options()["minPoolSize"]))
+    # Concurrent pings force the pool to open that many sockets
+    with ThreadPoolExecutor(max_workers=connections) as warmers:
+        list(warmers.map(lambda _: client.admin.command("ping"), range(connections)))
+    return connections
+
+
+def close_client() -> None:
+    global _client, _memory_client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        _memory_client = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    listener = _pool_listener
+    max_pool_size = get_client_options()["maxPoolSize"]
+    return {
+        "max_pool_size": max_pool_size,
+        "open": listener.open,
+        "checked_out": listener.checked_out,
+        "peak_checked_out": listener.peak_checked_out,
+        "utilization": round(listener.checked_out / max_pool_size, 3) if max_pool_size else 0.0,
+        "created": listener.created,
+        "closed": listener.closed,
+        "checkout_failures": listener.checkout_failures,
+    }
@@ -1,5 +1,8 @@
 import os
-from pymongo import MongoClient
+import re
+import json
+import base64
+from mongodb.mongodb_client import get_database
 from datetime import datetime
 import uuid
 from typing import Dict, List, Optional, Set
@@ -7,110 +10,206 @@ from utils.common_utils import to_init_caps
 from parsing.parsing_utils import extract_email
 from dotenv import load_dotenv
 from pathlib import Path
-from bson import Binary
+from mongodb.mongodb_blobs import put_blob
+from mongodb.mongodb_cache import cache_client, cache_jd, get_cached_client, get_cached_jd, invalidate_jd, invalidate_stats
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+
+# Synchronous data access, kept for scripts and CLI tools
+# (mongodb_blobs / mongodb_indexes). The API awaits mongodb_async instead.
 
 def initialize_mongodb():
     # Load .env from the project root
     env_path = Path(__file__).parent.parent / '.env'
     load_dotenv(dotenv_path=env_path)
     
-    MONGO_URI = os.getenv("MONGO_URI")
-    db_name = os.getenv("MONGO_DB")
-    
-    if not MONGO_URI:
-        raise ValueError("MONGO_URI environment variable is not set")
-    
-    try:
-        client = MongoClient(MONGO_URI)
-        return client[db_name]
-    except Exception as e:
-        raise Exception(f"Failed to initialize MongoDB client: {str(e)}")
+    # Shared process-wide client; see mongodb_client (which also checks
+    # MONGO_URI, unless MONGO_BACKEND=memory)
+    return get_database()
 
 db = initialize_mongodb()
 
+def client_query(client_name: str, company_id: str) -> Dict:
+    return {
+        "client_name": to_init_caps(client_name),
+        "company_id": company_id
+    }
+
+def jd_query(client_id, jd_name: str, company_id: str) -> Dict:
+    return {
+        "client_id": client_id,
+        "jd_title": to_init_caps(jd_name),
+        "company_id": company_id
+    }
+
+def build_new_client_fields(created_by: str) -> Dict:
+    # Written with $setOnInsert; client_name/company_id come from client_query
+    return {
+        "created_by": created_by,
+        "created_at": datetime.now()
+    }
+
+def build_new_jd_fields(jd_data: Dict, created_by: str) -> Dict:
+    # Written with $setOnInsert; client_id/jd_title/company_id come from jd_query
+    return {
+        "required_experience": jd_data.get("required_experience", ""),
+        "primary_skills": jd_data.get("primary_skills", []),
+        "secondary_skills": jd_data.get("secondary_skills", []),
+        "created_by": created_by,
+        "created_at": datetime.now()
+    }
+
+def find_client(client_name: str, company_id: str) -> Optional[Dict]:
+    client_doc = get_cached_client(company_id, client_name)
+    if client_doc is None:
+        client_doc = db.clients.find_one(client_query(client_name, company_id))
+        if client_doc:
+            cache_client(company_id, client_doc)
+    return client_doc
+
+def get_or_create_client(client_name: str, company_id: str, created_by: str) -> Dict:
+    client_doc = get_cached_client(company_id, client_name)
+    if client_doc is None:
+        query = client_query(client_name, company_id)
+        try:
+            client_doc = db.clients.find_one_and_update(
+                query,
+                {"$setOnInsert": build_new_client_fields(created_by)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost the insert race to another writer; its document is there now
+            client_doc = db.clients.find_one(query)
+        cache_client(company_id, client_doc)
+    return client_doc
+
+def find_jd(client_id, jd_name: str, company_id: str) -> Optional[Dict]:
+    jd_doc = get_cached_jd(company_id, client_id, jd_name)
+    if jd_doc is None:
+        jd_doc = db.job_descriptions.find_one(jd_query(client_id, jd_name, company_id))
+        if jd_doc:
+            cache_jd(company_id, jd_doc)
+    return jd_doc
+
+def get_or_create_jd(client_id, jd_name: str, jd_data: Dict, company_id: str, created_by: str) -> Dict:
+    jd_doc = get_cached_jd(company_id, client_id, jd_name)
+    if jd_doc is None:
+        query = jd_query(client_id, jd_name, company_id)
+        try:
+            jd_doc = db.job_descriptions.find_one_and_update(
+                query,
+                {"$setOnInsert": build_new_jd_fields(jd_data, created_by)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            jd_doc = db.job_descriptions.find_one(query)
+        cache_jd(company_id, jd_doc)
+    return jd_doc
+
+def build_search_terms(*values: Optional[str]) -> List[str]:
+    """
+    Lowercased keys for the /history search: every value whole, its words
+    and both halves of an email. ?q= is an anchored prefix match on these,
+    so the (company_id, search_terms) index can serve it.
+    """
+    terms: Set[str] = set()
+    for value in values:
+        if not value or value == "Not specified":
+            continue
+        value = value.strip().casefold()
+        terms.add(value)
+        terms.update(part for part in value.split("@") if part)
+        terms.update(re.findall(r"\w+", value))
+    return sorted(terms)
+
+def build_analysis_record(analysis_id: str, analysis_data: Dict, filename: str, file_ref: Dict,
+                          resume_text: str, client_doc: Dict, jd_doc: Dict,
+                          company_id: str, created_by: str) -> Dict:
+    candidate_email = extract_email(resume_text)
+    candidate_name = analysis_data.get("candidate_info", {}).get("candidate_name", "Not specified")
+    
+    # Get profile feedback data
+    profile_feedback = analysis_data.get("profile_feedback", {})
+
+    return {
+        "analysis_id": analysis_id,
+        "timestamp": datetime.now(),
+        "candidate_name": candidate_name,
+        "filename": filename,
+        "file_ref": file_ref,
+        "client_id": client_doc["_id"],
+        "client_name": client_doc["client_name"],
+        "jd_id": jd_doc["_id"],
+        "jd_title": jd_doc["jd_title"],
+        "required_experience": jd_doc.get("required_experience", ""),
+        "primary_skills": jd_doc.get("primary_skills", []),
+        "secondary_skills": jd_doc.get("secondary_skills", []),
+        "candidate_email": candidate_email,
+        "freelancer_status": profile_feedback.get("freelancer_status", False),
+        "has_linkedin": profile_feedback.get("has_linkedin", False),
+        "linkedin_url": profile_feedback.get("linkedin_url", ""),
+        "has_email": profile_feedback.get("has_email", False),
+        "match_score": analysis_data.get("skill_analysis", {}).get("match_score", 0),
+        "experience_match": analysis_data.get("experience_analysis", {}).get("experience_match", False),
+        "total_experience": analysis_data.get("experience_analysis", {}).get("total_experience", "N/A"),
+        "total_experience_months": analysis_data.get("experience_analysis", {}).get("total_experience_months"),
+        "matching_skills": analysis_data.get("skill_analysis", {}).get("matching_skills", []),
+        "missing_primary_skills": analysis_data.get("skill_analysis", {}).get("missing_primary_skills", []),
+        "missing_secondary_skills": analysis_data.get("skill_analysis", {}).get("missing_secondary_skills", []),
+        "llm_usage": analysis_data.get("llm_usage"),
+        "search_terms": build_search_terms(candidate_name, candidate_email,
+                                           client_doc["client_name"], jd_doc["jd_title"]),
+        "company_id": company_id,
+        "created_by": created_by,
+    }
+
+def backfill_search_terms(database, batch_size: int = 500) -> int:
+    """Add search_terms to analyses stored before it existed; they don't show up in searches until then."""
+    updated = 0
+    operations = []
+    fields = {"candidate_name": 1, "candidate_email": 1, "client_name": 1, "jd_title": 1}
+    for row in database.analysis_history.find({"search_terms": {"$exists": False}}, fields):
+        terms = build_search_terms(row.get("candidate_name"), row.get("candidate_email"),
+                                   row.get("client_name"), row.get("jd_title"))
+        operations.append(UpdateOne({"_id": row["_id"]}, {"$set": {"search_terms": terms}}))
+        if len(operations) >= batch_size:
+            updated += database.analysis_history.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += database.analysis_history.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+def build_jd_details(jd_doc: Dict) -> Dict:
+    return {
+        "job_description": jd_doc.get("jd_title", ""),
+        "required_experience": jd_doc.get("required_experience", ""),
+        "primary_skills": jd_doc.get("primary_skills", []),
+        "secondary_skills": jd_doc.get("secondary_skills", [])
+    }
+
 def store_results_in_mongodb(analysis_data: Dict, jd_data: Dict, filename: str, 
                           resume_text: str, file_content: bytes, client_name: str, 
                           job_description: str, created_by: str, company_id: str) -> Optional[str]:
     try:
-        # Get or create client
-        client_doc = db.clients.find_one({
-            "client_name": to_init_caps(client_name),
-            "company_id": company_id
-        })
-        if client_doc:
-            client_id = client_doc["_id"]
-        else:
-            # Create new client
-            new_client = {
-                "client_name": to_init_caps(client_name),
-                "company_id": company_id,
-                "created_by": created_by,
-                "created_at": datetime.now()
-            }
-            client_id = db.clients.insert_one(new_client).inserted_id
-            client_doc = new_client
-        
-        # Get or create job description
-        jd_doc = db.job_descriptions.find_one({
-            "client_id": client_id,
-            "jd_title": to_init_caps(job_description),
-            "company_id": company_id
-        })
-        
-        if jd_doc:
-            jd_id = jd_doc["_id"]
-        else:
-            # Create new job description
-            new_jd = {
-                "client_id": client_id,
-                "jd_title": to_init_caps(job_description),
-                "required_experience": jd_data.get("required_experience", ""),
-                "primary_skills": jd_data.get("primary_skills", []),
-                "secondary_skills": jd_data.get("secondary_skills", []),
-                "company_id": company_id,
-                "created_by": created_by,
-                "created_at": datetime.now()
-            }
-            jd_id = db.job_descriptions.insert_one(new_jd).inserted_id
-            jd_doc = new_jd
+        # Get or create client and job description
+        client_doc = get_or_create_client(client_name, company_id, created_by)
+        jd_doc = get_or_create_jd(client_doc["_id"], job_description, jd_data, company_id, created_by)
         
         # Store analysis
         analysis_id = str(uuid.uuid4())
-        candidate_email = extract_email(resume_text)
-        candidate_name = analysis_data.get("candidate_info", {}).get("candidate_name", "Not specified")
-        
-        # Get profile feedback data
-        profile_feedback = analysis_data.get("profile_feedback", {})
-        
-        analysis_record = {
-            "analysis_id": analysis_id,
-            "timestamp": datetime.now(),
-            "candidate_name": candidate_name,
-            "filename": filename,
-            "file_content": Binary(file_content),  # Store file content as BSON Binary
-            "client_id": client_id,
-            "client_name": client_doc["client_name"],
-            "jd_id": jd_id,
-            "jd_title": jd_doc["jd_title"],
-            "required_experience": jd_doc.get("required_experience", ""),
-            "primary_skills": jd_doc.get("primary_skills", []),
-            "secondary_skills": jd_doc.get("secondary_skills", []),
-            "candidate_email": candidate_email,
-            "freelancer_status": profile_feedback.get("freelancer_status", False),
-            "has_linkedin": profile_feedback.get("has_linkedin", False),
-            "linkedin_url": profile_feedback.get("linkedin_url", ""),
-            "has_email": profile_feedback.get("has_email", False),
-            "match_score": analysis_data.get("skill_analysis", {}).get("match_score", 0),
-            "experience_match": analysis_data.get("experience_analysis", {}).get("experience_match", False),
-            "total_experience": analysis_data.get("experience_analysis", {}).get("total_experience", "N/A"),
-            "matching_skills": analysis_data.get("skill_analysis", {}).get("matching_skills", []),
-            "missing_primary_skills": analysis_data.get("skill_analysis", {}).get("missing_primary_skills", []),
-            "missing_secondary_skills": analysis_data.get("skill_analysis", {}).get("missing_secondary_skills", []),
-            "company_id": company_id,
-            "created_by": created_by,
-        }
+
+        # Keep the file itself out of analysis_history
+        file_ref = put_blob(db, file_content, filename)
         
+        analysis_record = build_analysis_record(
+            analysis_id, analysis_data, filename, file_ref, resume_text,
+            client_doc, jd_doc, company_id, created_by
+        )
         db.analysis_history.insert_one(analysis_record)
+        invalidate_stats(company_id)
         
         return analysis_id
 
@@ -143,42 +242,263 @@ def store_results_in_mongodb(analysis_data: Dict, jd_data: Dict, filename: str,
 #     except Exception as e:
 #         raise Exception(f"Failed to fetch history: {str(e)}")
 
+def build_history_base_query(current_user: dict) -> Dict:
+    # Build query based on user role - only for analysis history
+    if current_user["role"] == "company_admin":
+        # Company admin can see all analyses for their company
+        return {"company_id": current_user["company_id"]}
+    elif current_user["role"] == "user":
+        # Regular user can only see their own analyses within their company
+        return {
+            "company_id": current_user["company_id"],
+            "created_by": current_user["id"]
+        }
+    # For other roles, return empty
+    return {"company_id": "invalid_id"}  # Ensure no results
+
+def serialize_history_item(item: Dict) -> Dict:
+    # Convert ObjectId to string for JSON serialization
+    item["_id"] = str(item["_id"])
+    if "client_id" in item:
+        item["client_id"] = str(item["client_id"])
+    if "jd_id" in item:
+        item["jd_id"] = str(item["jd_id"])
+    return item
+
 def fetch_analysis_history(current_user: dict) -> List[Dict]:
     try:
-        # Build query based on user role - only for analysis history
-        if current_user["role"] == "company_admin":
-            # Company admin can see all analyses for their company
-            query = {"company_id": current_user["company_id"]}
-        elif current_user["role"] == "user":
-            # Regular user can only see their own analyses within their company
-            query = {
-                "company_id": current_user["company_id"],
-                "created_by": current_user["id"]
-            }
-        else:
-            # For other roles, return empty
-            query = {"company_id": "invalid_id"}  # Ensure no results
-            # Alternatively, you could raise an error:
-            # raise Exception("Unauthorized role for history access")
+        query = build_history_base_query(current_user)
             
         # Exclude file_content from the query to reduce payload size
         history = list(db.analysis_history.find(
             query, 
-            {"file_content": 0}  # Exclude file content from results
+            {"file_content": 0, "file_ref": 0, "search_terms": 0}  # Exclude file content from results
         ).sort("timestamp", -1))
         
-        # Convert ObjectId to string for JSON serialization
-        for item in history:
-            item["_id"] = str(item["_id"])
-            if "client_id" in item:
-                item["client_id"] = str(item["client_id"])
-            if "jd_id" in item:
-                item["jd_id"] = str(item["jd_id"])
-        return history
+        return [serialize_history_item(item) for item in history]
     
     except Exception as e:
         raise Exception(f"Failed to fetch history: {str(e)}")
 
+# Fields a /history caller may ask for; analysis_id, timestamp and _id are always returned
+HISTORY_FIELDS = {
+    "analysis_id", "timestamp", "candidate_name", "candidate_email", "filename",
+    "client_id", "client_name", "jd_id", "jd_title", "required_experience",
+    "primary_skills", "secondary_skills", "freelancer_status", "has_linkedin",
+    "linkedin_url", "has_email", "match_score", "experience_match",
+    "total_experience", "matching_skills", "missing_primary_skills",
+    "missing_secondary_skills", "company_id", "created_by",
+}
+
+def encode_history_cursor(item: Dict) -> str:
+    payload = json.dumps({"t": item["timestamp"].isoformat(), "id": str(item["_id"])})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def decode_history_cursor(cursor: str) -> Dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {"timestamp": datetime.fromisoformat(payload["t"]), "_id": ObjectId(payload["id"])}
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def build_history_filters(filters: Dict) -> List[Dict]:
+    """
+    Translate /history filter parameters into Mongo conditions.
+    Supported keys: client_name, jd_title, min_score, max_score,
+    experience_match, date_from, date_to, q (prefix search over candidate
+    name/email, client and JD, word by word; see build_search_terms).
+    """
+    conditions: List[Dict] = []
+    if filters.get("client_name"):
+        conditions.append({"client_name": to_init_caps(filters["client_name"])})
+    if filters.get("jd_title"):
+        conditions.append({"jd_title": to_init_caps(filters["jd_title"])})
+
+    score_range = {}
+    if filters.get("min_score") is not None:
+        score_range["$gte"] = filters["min_score"]
+    if filters.get("max_score") is not None:
+        score_range["$lte"] = filters["max_score"]
+    if score_range:
+        conditions.append({"match_score": score_range})
+
+    if filters.get("experience_match") is not None:
+        conditions.append({"experience_match": filters["experience_match"]})
+
+    date_range = {}
+    if filters.get("date_from"):
+        date_range["$gte"] = filters["date_from"]
+    if filters.get("date_to"):
+        date_range["$lte"] = filters["date_to"]
+    if date_range:
+        conditions.append({"timestamp": date_range})
+
+    query = (filters.get("q") or "").strip().casefold()
+    if query:
+        # Anchored and case-sensitive on lowercased terms: an index range scan
+        conditions.append({"search_terms": {"$regex": "^" + re.escape(query)}})
+    return conditions
+
+HISTORY_SORT = [("timestamp", -1), ("_id", -1)]
+
+def build_history_page_query(current_user: dict, cursor: Optional[str], filters: Optional[Dict]):
+    """
+    :return: (query for all matching rows, query for rows after the cursor)
+    """
+    conditions = [build_history_base_query(current_user)] + build_history_filters(filters or {})
+    filtered_query = {"$and": conditions} if len(conditions) > 1 else conditions[0]
+
+    page_conditions = list(conditions)
+    if cursor:
+        position = decode_history_cursor(cursor)
+        page_conditions.append({"$or": [
+            {"timestamp": {"$lt": position["timestamp"]}},
+            {"timestamp": position["timestamp"], "_id": {"$lt": position["_id"]}},
+        ]})
+    page_query = {"$and": page_conditions} if len(page_conditions) > 1 else page_conditions[0]
+    return filtered_query, page_query
+
+def build_history_projection(fields: Optional[List[str]]) -> Dict:
+    if fields:
+        projection = {field: 1 for field in fields if field in HISTORY_FIELDS}
+        projection.update({"analysis_id": 1, "timestamp": 1})
+        return projection
+    return {"file_content": 0, "file_ref": 0, "search_terms": 0}
+
+def build_history_page(items: List[Dict], limit: int) -> Dict:
+    # Callers fetch limit + 1 rows; the extra one only tells us another page exists
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_history_cursor(items[-1])
+    return {
+        "items": [serialize_history_item(item) for item in items],
+        "next_cursor": next_cursor,
+    }
+
+def fetch_analysis_history_page(current_user: dict, limit: int = 50, cursor: Optional[str] = None,
+                                filters: Optional[Dict] = None, fields: Optional[List[str]] = None,
+                                include_total: bool = False) -> Dict:
+    """
+    One page of analysis history, newest first, using keyset pagination on
+    (timestamp, _id) so later pages cost the same as the first.
+    :return: {"items": [...], "next_cursor": str or None, "total": int (if asked)}
+    """
+    try:
+        filtered_query, page_query = build_history_page_query(current_user, cursor, filters)
+        items = list(
+            db.analysis_history.find(page_query, build_history_projection(fields))
+            .sort(HISTORY_SORT)
+            .limit(limit + 1)
+        )
+        page = build_history_page(items, limit)
+        if include_total:
+            page["total"] = db.analysis_history.count_documents(filtered_query)
+        return page
+
+    except ValueError:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to fetch history: {str(e)}")
+
+SCORE_BUCKETS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 101]
+
+def build_stats_pipeline(current_user: dict) -> List[Dict]:
+    """
+    One aggregation for the dashboard: totals, counts per client and JD,
+    and a match score histogram, all over the analyses the user can see.
+    """
+    experience_matched = {"$cond": [{"$eq": ["$experience_match", True]}, 1, 0]}
+    return [
+        {"$match": build_history_base_query(current_user)},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "analyses": {"$sum": 1},
+                    "avg_score": {"$avg": "$match_score"},
+                    "experience_matches": {"$sum": experience_matched},
+                    "clients": {"$addToSet": "$client_name"},
+                    "jds": {"$addToSet": {"client_name": "$client_name", "jd_title": "$jd_title"}},
+                }},
+                {"$project": {
+                    "analyses": 1,
+                    "avg_score": 1,
+                    "experience_matches": 1,
+                    "clients": {"$size": "$clients"},
+                    "jds": {"$size": "$jds"},
+                }},
+            ],
+            "by_client": [
+                {"$group": {
+                    "_id": "$client_name",
+                    "analyses": {"$sum": 1},
+                    "avg_score": {"$avg": "$match_score"},
+                    "experience_matches": {"$sum": experience_matched},
+                }},
+                {"$sort": {"analyses": -1, "_id": 1}},
+            ],
+            "by_jd": [
+                {"$group": {
+                    "_id": {"client_name": "$client_name", "jd_title": "$jd_title"},
+                    "analyses": {"$sum": 1},
+                    "avg_score": {"$avg": "$match_score"},
+                    "experience_matches": {"$sum": experience_matched},
+                }},
+                {"$sort": {"analyses": -1, "_id.client_name": 1, "_id.jd_title": 1}},
+            ],
+            "score_histogram": [
+                {"$bucket": {
+                    "groupBy": "$match_score",
+                    "boundaries": SCORE_BUCKETS,
+                    "default": "other",
+                    "output": {"count": {"$sum": 1}},
+                }},
+            ],
+        }},
+    ]
+
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+def _group_stats(row: Dict) -> Dict:
+    return {
+        "analyses": row["analyses"],
+        "avg_score": round(row.get("avg_score") or 0, 2),
+        "experience_match_rate": _rate(row["experience_matches"], row["analyses"]),
+    }
+
+def build_stats(facets: Dict) -> Dict:
+    totals = facets["totals"][0] if facets["totals"] else {}
+    analyses = totals.get("analyses", 0)
+    bucket_counts = {row["_id"]: row["count"] for row in facets["score_histogram"]}
+    return {
+        "analyses": analyses,
+        "clients": totals.get("clients", 0),
+        "jds": totals.get("jds", 0),
+        "avg_score": round(totals.get("avg_score") or 0, 2),
+        "experience_match_rate": _rate(totals.get("experience_matches", 0), analyses),
+        "by_client": [
+            {"client_name": row["_id"], **_group_stats(row)}
+            for row in facets["by_client"]
+        ],
+        "by_jd": [
+            {"client_name": row["_id"].get("client_name"), "jd_title": row["_id"].get("jd_title"), **_group_stats(row)}
+            for row in facets["by_jd"]
+        ],
+        "score_histogram": [
+            {"min": low, "max": high - 1, "count": bucket_counts.get(low, 0)}
+            for low, high in zip(SCORE_BUCKETS, SCORE_BUCKETS[1:])
+        ],
+    }
+
+def fetch_analysis_stats(current_user: dict) -> Dict:
+    try:
+        facets = next(db.analysis_history.aggregate(build_stats_pipeline(current_user)))
+        return build_stats(facets)
+    except Exception as e:
+        raise Exception(f"Failed to fetch stats: {str(e)}")
+
 # Update the fetch_client_names function
 def fetch_client_names(company_id: str) -> Set[str]:
     try:
@@ -189,10 +509,7 @@ def fetch_client_names(company_id: str) -> Set[str]:
 
 def fetch_client_details(client_name: str, company_id: str) -> Optional[Dict]:
     try:
-        client_doc = db.clients.find_one({
-            "client_name": to_init_caps(client_name),
-            "company_id": company_id
-        })
+        client_doc = find_client(client_name, company_id)
         
         if not client_doc:
             return None
@@ -208,21 +525,13 @@ def fetch_client_details(client_name: str, company_id: str) -> Optional[Dict]:
         if not jd_doc:
             return None
             
-        return {
-            "job_description": jd_doc.get("jd_title", ""),
-            "required_experience": jd_doc.get("required_experience", ""),
-            "primary_skills": jd_doc.get("primary_skills", []),
-            "secondary_skills": jd_doc.get("secondary_skills", [])
-        }
+        return build_jd_details(jd_doc)
     except Exception as e:
         raise Exception(f"Failed to fetch client details: {str(e)}")
 
 def fetch_jd_names_for_client(client_name: str, company_id: str) -> Optional[List[str]]:
     try:
-        client_doc = db.clients.find_one({
-            "client_name": to_init_caps(client_name),
-            "company_id": company_id
-        })
+        client_doc = find_client(client_name, company_id)
         
         if not client_doc:
             return None
@@ -240,31 +549,17 @@ def fetch_jd_names_for_client(client_name: str, company_id: str) -> Optional[Lis
 
 def fetch_client_details_by_jd(client_name: str, jd_name: str, company_id: str) -> Optional[Dict]:
     try:
-        client_doc = db.clients.find_one({
-            "client_name": to_init_caps(client_name),
-            "company_id": company_id
-        })
+        client_doc = find_client(client_name, company_id)
         
         if not client_doc:
             return None
             
-        client_id = client_doc["_id"]
-        
-        jd_doc = db.job_descriptions.find_one({
-            "client_id": client_id,
-            "jd_title": to_init_caps(jd_name),
-            "company_id": company_id
-        })
+        jd_doc = find_jd(client_doc["_id"], jd_name, company_id)
         
         if not jd_doc:
             return None
             
-        return {
-            "job_description": jd_doc.get("jd_title", ""),
-            "required_experience": jd_doc.get("required_experience", ""),
-            "primary_skills": jd_doc.get("primary_skills", []),
-            "secondary_skills": jd_doc.get("secondary_skills", [])
-        }
+        return build_jd_details(jd_doc)
     except Exception as e:
         raise Exception(f"Failed to fetch client details by JD: {str(e)}")
     
@@ -274,20 +569,11 @@ def update_job_description(client_name: str, jd_name: str, required_experience:
     Update the job description details for a given client and JD name in MongoDB
     """
     try:
-        client_doc = db.clients.find_one({
-            "client_name": to_init_caps(client_name),
-            "company_id": company_id
-        })
+        client_doc = find_client(client_name, company_id)
         if not client_doc:
             return False
             
-        client_id = client_doc["_id"]
-        
-        jd_doc = db.job_descriptions.find_one({
-            "client_id": client_id,
-            "jd_title": to_init_caps(jd_name),
-            "company_id": company_id
-        })
+        jd_doc = find_jd(client_doc["_id"], jd_name, company_id)
         if not jd_doc:
             return False
             
@@ -299,6 +585,7 @@ def update_job_description(client_name: str, jd_name: str, required_experience:
                 "secondary_skills": secondary_skills
             }}
         )
+        invalidate_jd(company_id, client_doc["_id"], jd_name)
         
         return result.modified_count > 0
     except Exception as e:
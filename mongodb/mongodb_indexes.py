@@ -0,0 +1,272 @@
+import argparse
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+# Every index the app relies on. Keys follow the equality -> sort order
+# of the queries in main.py and mongodb_db.py.
+REQUIRED_INDEXES: List[Dict[str, Any]] = [
+    {"collection": "super_admins", "keys": [("email", ASCENDING)], "options": {"unique": True}},
+    {"collection": "companies", "keys": [("id", ASCENDING)], "options": {}},
+    {"collection": "companies", "keys": [("name", ASCENDING)], "options": {}},
+    {"collection": "company_users", "keys": [("email", ASCENDING)], "options": {}},
+    {"collection": "company_users", "keys": [("id", ASCENDING)], "options": {}},
+    {"collection": "company_users", "keys": [("company_id", ASCENDING)], "options": {}},
+    {"collection": "password_resets", "keys": [("token", ASCENDING)], "options": {}},
+    # TTL: MongoDB removes reset rows once expire_at has passed
+    {"collection": "password_resets", "keys": [("expire_at", ASCENDING)], "options": {"expireAfterSeconds": 0}},
+    # Unique so concurrent get-or-create upserts can't insert duplicates
+    {"collection": "clients", "keys": [("company_id", ASCENDING), ("client_name", ASCENDING)], "options": {"unique": True}},
+    {
+        "collection": "job_descriptions",
+        "keys": [("company_id", ASCENDING), ("client_id", ASCENDING), ("jd_title", ASCENDING)],
+        "options": {"unique": True},
+    },
+    {
+        "collection": "job_descriptions",
+        "keys": [("company_id", ASCENDING), ("client_id", ASCENDING), ("created_at", DESCENDING)],
+        "options": {},
+    },
+    {
+        "collection": "analysis_history",
+        "keys": [("company_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+        "options": {},
+    },
+    {
+        "collection": "analysis_history",
+        "keys": [("company_id", ASCENDING), ("created_by", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+        "options": {},
+    },
+    {"collection": "analysis_history", "keys": [("analysis_id", ASCENDING)], "options": {}},
+    # /history?q= prefix search (multikey over search_terms)
+    {"collection": "analysis_history", "keys": [("company_id", ASCENDING), ("search_terms", ASCENDING)], "options": {}},
+    # Re-scoring every analysis of one JD
+    {"collection": "analysis_history", "keys": [("company_id", ASCENDING), ("jd_id", ASCENDING)], "options": {}},
+    {"collection": "analysis_jobs", "keys": [("job_id", ASCENDING)], "options": {"unique": True}},
+    # Only queued/running jobs carry active_key; it dedupes retried uploads
+    {
+        "collection": "analysis_jobs",
+        "keys": [("active_key", ASCENDING)],
+        "options": {"unique": True, "partialFilterExpression": {"active_key": {"$exists": True}}},
+    },
+    {"collection": "analysis_jobs", "keys": [("status", ASCENDING), ("created_at", ASCENDING)], "options": {}},
+    {"collection": "analysis_jobs", "keys": [("status", ASCENDING), ("lease_expires_at", ASCENDING)], "options": {}},
+    # Finished jobs are kept for a week
+    {"collection": "analysis_jobs", "keys": [("finished_at", ASCENDING)], "options": {"expireAfterSeconds": 7 * 24 * 3600}},
+    {"collection": "rescore_jobs", "keys": [("job_id", ASCENDING)], "options": {"unique": True}},
+    # Finished re-score jobs are kept for a week
+    {"collection": "rescore_jobs", "keys": [("finished_at", ASCENDING)], "options": {"expireAfterSeconds": 7 * 24 * 3600}},
+    {"collection": "resume_files.files", "keys": [("metadata.sha256", ASCENDING)], "options": {}},
+]
+
+# The unique clients/JD indexes replaced non-unique ones on the same keys,
+# and can't be built while duplicates exist. `--dedupe` drops the indexes
+# on those keys, merges duplicates (the oldest document is kept, references
+# are repointed to it) and lets ensure_indexes build the unique ones.
+# Each entry: collection, the keys that must be unique, and the
+# (collection, field) pairs that reference its _id.
+DEDUPE_PLAN: List[Dict[str, Any]] = [
+    {
+        "collection": "clients",
+        "keys": ["company_id", "client_name"],
+        "references": [("job_descriptions", "client_id"), ("analysis_history", "client_id")],
+    },
+    # After clients: merging clients can make JDs of the same title collide
+    {
+        "collection": "job_descriptions",
+        "keys": ["company_id", "client_id", "jd_title"],
+        "references": [("analysis_history", "jd_id")],
+    },
+]
+
+# Rows of the last ensure_indexes run that failed, for /health
+_index_errors: List[Dict[str, Any]] = []
+
+# Real query shapes (filter, sort) that must not fall back to a collection
+# scan. allow_sort marks shapes whose few matches are sorted in memory.
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "super_admins", "filter": {"email": "probe@example.com"}},
+    {"collection": "company_users", "filter": {"email": "probe@example.com"}},
+    {"collection": "company_users", "filter": {"company_id": "probe"}},
+    {"collection": "companies", "filter": {"id": "probe"}},
+    {"collection": "password_resets", "filter": {"token": "probe"}},
+    {"collection": "clients", "filter": {"client_name": "Probe", "company_id": "probe"}},
+    {"collection": "job_descriptions", "filter": {"client_id": "probe", "jd_title": "Probe", "company_id": "probe"}},
+    {
+        "collection": "job_descriptions",
+        "filter": {"client_id": "probe", "company_id": "probe"},
+        "sort": [("created_at", DESCENDING)],
+    },
+    {
+        "collection": "analysis_history",
+        "filter": {"company_id": "probe"},
+        "sort": [("timestamp", DESCENDING), ("_id", DESCENDING)],
+    },
+    {
+        "collection": "analysis_history",
+        "filter": {"company_id": "probe", "created_by": "probe"},
+        "sort": [("timestamp", DESCENDING), ("_id", DESCENDING)],
+    },
+    {
+        "collection": "analysis_history",
+        "filter": {"company_id": "probe", "search_terms": {"$regex": "^probe"}},
+        "sort": [("timestamp", DESCENDING), ("_id", DESCENDING)],
+        "allow_sort": True,
+    },
+    {"collection": "analysis_history", "filter": {"analysis_id": "probe", "company_id": "probe"}},
+    {"collection": "analysis_history", "filter": {"company_id": "probe", "jd_id": "probe"}},
+    {"collection": "analysis_jobs", "filter": {"job_id": "probe", "company_id": "probe"}},
+    {"collection": "analysis_jobs", "filter": {"status": "queued"}, "sort": [("created_at", ASCENDING)]},
+    {"collection": "rescore_jobs", "filter": {"job_id": "probe", "company_id": "probe"}},
+]
+
+
+def ensure_indexes(database) -> List[Dict[str, Any]]:
+    """
+    Create every index in REQUIRED_INDEXES (a no-op for ones that exist).
+    :return: One report row per index with its name or the error
+    """
+    report = []
+    for spec in REQUIRED_INDEXES:
+        row = {"collection": spec["collection"], "keys": spec["keys"]}
+        try:
+            row["name"] = database[spec["collection"]].create_index(spec["keys"], **spec["options"])
+        except OperationFailure as e:
+            # e.g. an index on the same keys already exists with other options
+            row["error"] = str(e)
+        report.append(row)
+    _index_errors[:] = [
+        {"collection": row["collection"], "keys": [key for key, _ in row["keys"]], "error": row["error"]}
+        for row in report if "error" in row
+    ]
+    return report
+
+
+def get_index_errors() -> List[Dict[str, Any]]:
+    """Indexes the last ensure_indexes run could not create (e.g. a unique index over duplicates)."""
+    return list(_index_errors)
+
+
+def merge_duplicates(database, collection: str, keys: List[str], references: List[Tuple[str, str]]) -> int:
+    """
+    Keep the oldest document of every set sharing `keys`, repoint the
+    references to it and delete the others.
+    :return: Number of documents deleted
+    """
+    pipeline = [
+        {"$sort": {"created_at": ASCENDING, "_id": ASCENDING}},
+        {"$group": {"_id": {key: f"${key}" for key in keys}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ]
+    removed = 0
+    for group in list(database[collection].aggregate(pipeline)):
+        keeper, duplicates = group["ids"][0], group["ids"][1:]
+        for ref_collection, field in references:
+            database[ref_collection].update_many({field: {"$in": duplicates}}, {"$set": {field: keeper}})
+        removed += database[collection].delete_many({"_id": {"$in": duplicates}}).deleted_count
+    return removed
+
+
+def drop_dedupe_indexes(database) -> List[str]:
+    """
+    Drop every index on the keys of a DEDUPE_PLAN entry: the old
+    non-unique ones make create_index fail with IndexOptionsConflict, and
+    a unique one would reject JDs repointed to a merged client.
+    :return: 'collection.index_name' of every dropped index
+    """
+    dropped = []
+    for step in DEDUPE_PLAN:
+        collection = database[step["collection"]]
+        for name, info in collection.index_information().items():
+            if [key for key, _ in info["key"]] == step["keys"]:
+                collection.drop_index(name)
+                dropped.append(f"{step['collection']}.{name}")
+    return dropped
+
+
+def dedupe_clients_and_jds(database) -> Dict[str, Any]:
+    """
+    Migration for the unique clients/JD indexes: drop the indexes on their
+    keys and merge duplicates. ensure_indexes must run afterwards to build
+    the unique indexes again.
+    :return: Documents removed per collection and the dropped indexes
+    """
+    report: Dict[str, Any] = {"dropped_indexes": drop_dedupe_indexes(database)}
+    for step in DEDUPE_PLAN:
+        report[step["collection"]] = merge_duplicates(database, step["collection"], step["keys"], step["references"])
+    return report
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def verify_indexes(database) -> List[Dict[str, Any]]:
+    """
+    Run explain() on every query shape and flag winning plans that scan
+    the whole collection.
+    :return: One report row per query shape
+    """
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = database[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explain = cursor.explain()
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "collection": shape["collection"],
+            "filter": list(shape["filter"].keys()),
+            "sort": [key for key, _ in shape.get("sort", [])],
+            "stages": stages,
+            "ok": "COLLSCAN" not in stages and ("SORT" not in stages or shape.get("allow_sort", False)),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    from mongodb.mongodb_db import db
+
+    arg_parser = argparse.ArgumentParser(description="Create and verify MongoDB indexes")
+    arg_parser.add_argument("--verify", action="store_true", help="Also explain() every query shape")
+    arg_parser.add_argument("--backfill-search-terms", action="store_true",
+                            help="Add search_terms to analyses stored before history search used them")
+    arg_parser.add_argument("--dedupe", action="store_true",
+                            help="Merge duplicate clients/JDs so their unique indexes can be built")
+    args = arg_parser.parse_args()
+
+    if args.dedupe:
+        result = dedupe_clients_and_jds(db)
+        for step in DEDUPE_PLAN:
+            print(f"Merged {result[step['collection']]} duplicate {step['collection']}")
+        for name in result["dropped_indexes"]:
+            print(f"Dropped index {name}")
+
+    for row in ensure_indexes(db):
+        status = row.get("error") or row["name"]
+        print(f"{row['collection']}: {status}")
+
+    if args.backfill_search_terms:
+        from mongodb.mongodb_db import backfill_search_terms
+        print(f"Backfilled search_terms on {backfill_search_terms(db)} analyses")
+
+    if args.verify:
+        if get_index_errors():
+            raise SystemExit(f"{len(get_index_errors())} index(es) could not be created (try --dedupe)")
+        failed = 0
+        for row in verify_indexes(db):
+            failed += not row["ok"]
+            mark = "OK  " if row["ok"] else "SCAN"
+            print(f"{mark} {row['collection']} filter={row['filter']} sort={row['sort']} plan={row['stages']}")
+        if failed:
+            raise SystemExit(f"{failed} query shape(s) are not covered by an index")
@@ -0,0 +1,227 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from mongodb.mongodb_async import adb
+
+# Persistent state of background analysis jobs (collection analysis_jobs).
+#
+# queued -> running -> completed | failed | cancelled
+#
+# A worker claims a job atomically and holds a lease on it; if the process
+# dies, the lease runs out and recover_stale_jobs() puts the job back in
+# the queue (or fails it after too many attempts). While a job is queued
+# or running it carries an active_key, unique across the collection, so a
+# retried upload of the same resume for the same JD returns the existing
+# job instead of analysing twice.
+#
+# A job refused by a provider (Gemini/LlamaParse outage) goes back to the
+# queue with run_after set, so it is retried once the provider recovers.
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Fields returned by GET /jobs/{id}
+JOB_PUBLIC_FIELDS = {
+    "_id": 0,
+    "job_id": 1,
+    "status": 1,
+    "filename": 1,
+    "client_name": 1,
+    "jd_title": 1,
+    "attempts": 1,
+    "deferrals": 1,
+    "run_after": 1,
+    "cancel_requested": 1,
+    "analysis_id": 1,
+    "analysis": 1,
+    "error": 1,
+    "created_at": 1,
+    "started_at": 1,
+    "finished_at": 1,
+}
+
+
+def _now() -> datetime:
+    return datetime.now()
+
+
+def build_job_doc(company_id: str, created_by: str, filename: str, file_ref: Dict,
+                  jd_data: Dict, options: Dict, active_key: str) -> Dict:
+    now = _now()
+    return {
+        "job_id": str(uuid.uuid4()),
+        "status": "queued",
+        "company_id": company_id,
+        "created_by": created_by,
+        "filename": filename,
+        "file_ref": file_ref,
+        "jd_data": jd_data,
+        "client_name": jd_data.get("client_name"),
+        "jd_title": jd_data.get("jd_title"),
+        "options": options,
+        "active_key": active_key,
+        "attempts": 0,
+        "deferrals": 0,
+        "run_after": None,
+        "cancel_requested": False,
+        "analysis_id": None,
+        "analysis": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "lease_expires_at": None,
+    }
+
+
+async def enqueue_job(job_doc: Dict) -> Dict:
+    """
+    Insert a queued job, or return the active job with the same active_key.
+    :return: The job document that will do the work
+    """
+    try:
+        await adb.analysis_jobs.insert_one(job_doc)
+        return job_doc
+    except DuplicateKeyError:
+        existing = await adb.analysis_jobs.find_one({"active_key": job_doc["active_key"]})
+        if existing:
+            return existing
+        # The other job finished between the insert and the lookup
+        await adb.analysis_jobs.insert_one(job_doc)
+        return job_doc
+
+
+async def claim_next_job(lease_seconds: int) -> Optional[Dict]:
+    """Atomically move the oldest queued job that is due to running."""
+    now = _now()
+    return await adb.analysis_jobs.find_one_and_update(
+        # $not also matches jobs without run_after
+        {"status": "queued", "run_after": {"$not": {"$gt": now}}},
+        {
+            "$set": {
+                "status": "running",
+                "started_at": now,
+                "updated_at": now,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def renew_lease(job_id: str, lease_seconds: int) -> None:
+    now = _now()
+    await adb.analysis_jobs.update_one(
+        {"job_id": job_id, "status": "running"},
+        {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}},
+    )
+
+
+async def finish_job(job_id: str, status: str, **fields: Any) -> None:
+    now = _now()
+    await adb.analysis_jobs.update_one(
+        {"job_id": job_id, "status": "running"},
+        {
+            "$set": {"status": status, "finished_at": now, "updated_at": now, **fields},
+            "$unset": {"active_key": "", "lease_expires_at": ""},
+        },
+    )
+
+
+async def defer_job(job_id: str, delay_seconds: float, error: str) -> None:
+    """
+    Put a running job back in the queue, not to be claimed for delay_seconds.
+    The claim doesn't count as an attempt: attempts limit lost workers.
+    """
+    now = _now()
+    await adb.analysis_jobs.update_one(
+        {"job_id": job_id, "status": "running"},
+        {
+            "$set": {"status": "queued", "run_after": now + timedelta(seconds=delay_seconds),
+                     "error": error, "updated_at": now},
+            "$inc": {"attempts": -1, "deferrals": 1},
+            "$unset": {"lease_expires_at": ""},
+        },
+    )
+
+
+async def is_cancel_requested(job_id: str) -> bool:
+    job = await adb.analysis_jobs.find_one({"job_id": job_id}, {"cancel_requested": 1})
+    return bool(job and job.get("cancel_requested"))
+
+
+async def cancel_job(job_id: str, company_id: str) -> Optional[Dict]:
+    """
+    Cancel a queued job outright; flag a running one so its worker stops
+    at the next stage boundary. Finished jobs are left as they are.
+    :return: The job after the change, None if it doesn't exist
+    """
+    now = _now()
+    query = {"job_id": job_id, "company_id": company_id}
+    job = await adb.analysis_jobs.find_one_and_update(
+        {**query, "status": "queued"},
+        {
+            "$set": {"status": "cancelled", "cancel_requested": True, "finished_at": now, "updated_at": now},
+            "$unset": {"active_key": ""},
+        },
+        projection=JOB_PUBLIC_FIELDS,
+        return_document=ReturnDocument.AFTER,
+    )
+    if job:
+        return job
+    return await adb.analysis_jobs.find_one_and_update(
+        {**query, "status": {"$nin": list(FINAL_STATUSES)}},
+        {"$set": {"cancel_requested": True, "updated_at": now}},
+        projection=JOB_PUBLIC_FIELDS,
+        return_document=ReturnDocument.AFTER,
+    ) or await fetch_job(job_id, company_id)
+
+
+async def fetch_job(job_id: str, company_id: str) -> Optional[Dict]:
+    return await adb.analysis_jobs.find_one({"job_id": job_id, "company_id": company_id}, JOB_PUBLIC_FIELDS)
+
+
+async def recover_stale_jobs(max_attempts: int) -> Dict[str, int]:
+    """
+    Requeue running jobs whose lease has expired (their worker died), or
+    fail them once they have used up max_attempts.
+    """
+    now = _now()
+    stale = {"status": "running", "lease_expires_at": {"$lt": now}}
+    failed = await adb.analysis_jobs.update_many(
+        {**stale, "attempts": {"$gte": max_attempts}},
+        {
+            "$set": {"status": "failed", "error": "Worker lost too many times", "finished_at": now, "updated_at": now},
+            "$unset": {"active_key": "", "lease_expires_at": ""},
+        },
+    )
+    requeued = await adb.analysis_jobs.update_many(
+        stale,
+        {"$set": {"status": "queued", "updated_at": now}, "$unset": {"lease_expires_at": ""}},
+    )
+    return {"requeued": requeued.modified_count, "failed": failed.modified_count}
+
+
+async def release_jobs_on_shutdown(job_ids) -> int:
+    """Put this process's unfinished jobs straight back in the queue."""
+    if not job_ids:
+        return 0
+    result = await adb.analysis_jobs.update_many(
+        {"job_id": {"$in": list(job_ids)}, "status": "running"},
+        {"$set": {"status": "queued", "updated_at": _now()}, "$unset": {"lease_expires_at": ""}},
+    )
+    return result.modified_count
+
+
+async def count_active_jobs() -> Dict[str, int]:
+    return {
+        status: await adb.analysis_jobs.count_documents({"status": status})
+        for status in ("queued", "running")
+    }
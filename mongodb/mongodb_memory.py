@@ -0,0 +1,41 @@
+from typing import Any, Tuple
+
+# In-memory MongoDB for offline benchmarks and smoke runs, selected with
+# MONGO_BACKEND=memory (see mongodb_client.get_async_client). Needs the
+# mongomock and mongomock-motor packages, which are not runtime
+# requirements; this module is only imported when the memory backend is
+# asked for, so the shim below never touches a production process.
+
+
+def _accept_bulk_sort(builder) -> None:
+    """
+    pymongo >= 4.11 passes sort= to the bulk builder for UpdateOne and
+    ReplaceOne, which mongomock 4.3 doesn't accept; without this every
+    bulk_write (e.g. re-scoring) fails on the memory backend.
+    """
+    for name in ("add_update", "add_replace"):
+        original = getattr(builder, name)
+        if getattr(original, "_accepts_sort", False):
+            continue
+
+        def add(self, *args, _original=original, sort=None, **kwargs):
+            if sort is not None:
+                raise NotImplementedError("MONGO_BACKEND=memory: bulk operations with sort are not supported")
+            return _original(self, *args, **kwargs)
+
+        add._accepts_sort = True
+        setattr(builder, name, add)
+
+
+def create_memory_client() -> Tuple[Any, Any]:
+    """
+    :return: (sync mongomock client, async client over the same data)
+    """
+    try:
+        import mongomock
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError as e:
+        raise Exception(f"MONGO_BACKEND=memory needs mongomock and mongomock-motor: {str(e)}")
+    _accept_bulk_sort(mongomock.collection.BulkOperationBuilder)
+    sync_client = mongomock.MongoClient()
+    return sync_client, AsyncMongoMockClient(mock_mongo_client=sync_client)
@@ -0,0 +1,188 @@
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+from mongodb.mongodb_cache import invalidate_stats
+from utils.experience_utils import experience_matches, parse_months_text
+from utils.skill_utils import get_skill_matcher
+
+# Re-scoring stored analyses after a JD edit, without calling Gemini.
+#
+# Each analysis_history row keeps the JD snapshot it was scored against
+# (primary_skills/secondary_skills) plus which of those skills were found,
+# so the candidate's status for every old skill is known. Skills new to
+# the JD are looked up in the resume text when it is still available
+# (parse cache, keyed by the file's sha256) and otherwise count as
+# missing. experience_match is recomputed from total_experience_months.
+#
+# Job progress lives in the rescore_jobs collection, so GET /rescore/{id}
+# answers from any API process and survives restarts.
+
+RESCORE_FIELDS = {
+    "primary_skills": 1,
+    "secondary_skills": 1,
+    "matching_skills": 1,
+    "missing_primary_skills": 1,
+    "missing_secondary_skills": 1,
+    "total_experience_months": 1,
+    "total_experience": 1,
+    "file_ref.sha256": 1,
+}
+
+# Fields returned by GET /rescore/{id}
+RESCORE_JOB_PUBLIC_FIELDS = {"_id": 0, "company_id": 0}
+
+
+def _fold(skills: Optional[List[str]]) -> set:
+    return {skill.casefold() for skill in (skills or []) if skill}
+
+
+def rescore_skills(row: Dict, primary_skills: List[str], secondary_skills: List[str],
+                   resume_text_lookup: Optional[Callable[[str], Optional[str]]] = None) -> Dict:
+    """
+    New skill fields for one stored analysis against the updated JD.
+    :return: {"match_score", "matching_skills", "missing_primary_skills",
+              "missing_secondary_skills", "unverified_skills"}
+    """
+    old_skills = _fold(row.get("primary_skills")) | _fold(row.get("secondary_skills"))
+    missing = _fold(row.get("missing_primary_skills")) | _fold(row.get("missing_secondary_skills"))
+    found = (old_skills - missing) | _fold(row.get("matching_skills"))
+
+    unknown = [skill for skill in primary_skills + secondary_skills if skill.casefold() not in old_skills]
+    unverified: List[str] = []
+    if unknown:
+        sha256 = (row.get("file_ref") or {}).get("sha256")
+        resume_text = resume_text_lookup(sha256) if resume_text_lookup and sha256 else None
+        if resume_text:
+            matcher = get_skill_matcher({"primary_skills": unknown, "secondary_skills": []})
+            found |= _fold(list(matcher.find(resume_text)))
+        else:
+            unverified = unknown
+
+    matching = [skill for skill in primary_skills if skill.casefold() in found]
+    return {
+        "match_score": round(100 * len(matching) / len(primary_skills)) if primary_skills else 0,
+        "matching_skills": matching,
+        "missing_primary_skills": [skill for skill in primary_skills if skill.casefold() not in found],
+        "missing_secondary_skills": [skill for skill in secondary_skills if skill.casefold() not in found],
+        "unverified_skills": unverified,
+    }
+
+
+def _row_months(row: Dict) -> float:
+    months = row.get("total_experience_months")
+    if months is None:
+        months = parse_months_text(row.get("total_experience"))
+    return np.nan if months is None else months
+
+
+def rescore_jd_analyses(database, company_id: str, jd_doc: Dict, batch_size: int = 1000,
+                        resume_text_lookup: Optional[Callable[[str], Optional[str]]] = None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Re-score every analysis of one JD in batches of bulk_write updates.
+    :param progress: Called with (processed, total) after each batch
+    :return: {"total", "processed", "updated", "unverified_rows"}
+    """
+    query = {"company_id": company_id, "jd_id": jd_doc["_id"]}
+    primary_skills = jd_doc.get("primary_skills", [])
+    secondary_skills = jd_doc.get("secondary_skills", [])
+    required_experience = jd_doc.get("required_experience", "")
+    rescored_at = datetime.now()
+
+    total = database.analysis_history.count_documents(query)
+    summary = {"total": total, "processed": 0, "updated": 0, "unverified_rows": 0}
+    if progress:
+        progress(0, total)
+
+    def flush(rows: List[Dict]) -> None:
+        # Experience for the whole batch in one vectorized comparison
+        months = np.array([_row_months(row) for row in rows], dtype=np.float64)
+        matches = experience_matches(np.nan_to_num(months), required_experience) & ~np.isnan(months)
+        operations = []
+        for row, experience_match in zip(rows, matches):
+            fields = rescore_skills(row, primary_skills, secondary_skills, resume_text_lookup)
+            summary["unverified_rows"] += bool(fields["unverified_skills"])
+            fields.update({
+                "experience_match": bool(experience_match),
+                "primary_skills": primary_skills,
+                "secondary_skills": secondary_skills,
+                "required_experience": required_experience,
+                "rescored_at": rescored_at,
+            })
+            operations.append(UpdateOne({"_id": row["_id"]}, {"$set": fields}))
+        if operations:
+            result = database.analysis_history.bulk_write(operations, ordered=False)
+            summary["updated"] += result.modified_count
+        summary["processed"] += len(rows)
+        if progress:
+            progress(summary["processed"], total)
+
+    batch: List[Dict] = []
+    for row in database.analysis_history.find(query, RESCORE_FIELDS).batch_size(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
+
+
+def create_rescore_job(database, company_id: str, client_name: str, jd_title: str) -> Dict:
+    now = datetime.now()
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "company_id": company_id,
+        "client_name": client_name,
+        "jd_title": jd_title,
+        "status": "queued",
+        "total": None,
+        "processed": 0,
+        "updated": 0,
+        "unverified_rows": 0,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+        "error": None,
+    }
+    database.rescore_jobs.insert_one(dict(job))
+    return job
+
+
+def _update_job(database, job: Dict, **fields) -> None:
+    job.update(fields, updated_at=datetime.now())
+    database.rescore_jobs.update_one(
+        {"job_id": job["job_id"]}, {"$set": {**fields, "updated_at": job["updated_at"]}}
+    )
+
+
+def run_rescore_job(job: Dict, database, jd_doc: Dict,
+                    resume_text_lookup: Optional[Callable[[str], Optional[str]]] = None,
+                    batch_size: int = 1000) -> Dict:
+    """Run rescore_jd_analyses, keeping the job's progress fields current."""
+    def progress(processed: int, total: int) -> None:
+        _update_job(database, job, processed=processed, total=total)
+
+    try:
+        _update_job(database, job, status="running")
+        summary = rescore_jd_analyses(
+            database, job["company_id"], jd_doc, batch_size,
+            resume_text_lookup=resume_text_lookup, progress=progress
+        )
+        _update_job(database, job, status="completed", finished_at=datetime.now(), **summary)
+        invalidate_stats(job["company_id"])
+    except Exception as e:
+        print(f"Re-score job {job['job_id']} failed: {e}")
+        try:
+            _update_job(database, job, status="failed", error=str(e), finished_at=datetime.now())
+        except Exception as update_error:
+            print(f"Re-score job {job['job_id']} status not saved: {update_error}")
+    return job
+
+
+def get_rescore_job(database, job_id: str, company_id: str) -> Optional[Dict]:
+    return database.rescore_jobs.find_one({"job_id": job_id, "company_id": company_id}, RESCORE_JOB_PUBLIC_FIELDS)
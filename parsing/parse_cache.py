@@ -0,0 +1,156 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from utils.common_utils import get_env_int
+
+
+def hash_content(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class MemoryParseCache:
+    """In-process LRU tier, bounded by the total size of the cached text."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: Dict) -> None:
+        size = len(entry["text"].encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old["size"]
+            self._entries[key] = {**entry, "size": size}
+            self.current_bytes += size
+            # Evict least recently used entries until we fit again
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted["size"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteParseCache:
+    """On-disk tier so parsed text survives restarts."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parsed_resumes ("
+                "sha256 TEXT PRIMARY KEY, text TEXT NOT NULL, parser TEXT, created_at REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, parser FROM parsed_resumes WHERE sha256 = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"text": row[0], "parser": row[1]}
+
+    def put(self, key: str, entry: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed_resumes (sha256, text, parser, created_at) VALUES (?, ?, ?, ?)",
+                (key, entry["text"], entry.get("parser"), time.time()),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parsed_resumes").fetchone()[0]
+
+
+class ParseCache:
+    """
+    Content-addressed cache of extracted resume text, keyed by the SHA-256
+    of the uploaded bytes. Tiers are checked in order and a hit in a slower
+    tier is copied into the faster ones.
+    """
+
+    def __init__(self, tiers: List):
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        for position, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None:
+                for faster in self.tiers[:position]:
+                    faster.put(key, entry)
+                self.hits += 1
+                return {"text": entry["text"], "parser": entry.get("parser")}
+        self.misses += 1
+        return None
+
+    def put(self, key: str, text: str, parser: str) -> None:
+        entry = {"text": text, "parser": parser}
+        for tier in self.tiers:
+            tier.put(key, entry)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "+".join(tier.name for tier in self.tiers) or "none",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": {tier.name: len(tier) for tier in self.tiers},
+        }
+
+
+_parse_cache: Optional[ParseCache] = None
+
+
+def initialize_parse_cache() -> ParseCache:
+    """
+    Build the cache from the environment:
+      PARSE_CACHE_BACKEND   memory | sqlite | tiered | none (default memory)
+      PARSE_CACHE_MAX_BYTES size bound of the memory tier (default 64 MB)
+      PARSE_CACHE_PATH      SQLite file for the disk tier
+    """
+    backend = os.getenv("PARSE_CACHE_BACKEND", "memory").lower()
+    max_bytes = get_env_int("PARSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+    path = os.getenv("PARSE_CACHE_PATH", "parse_cache.sqlite3")
+
+    tiers: List = []
+    if backend in ("memory", "tiered"):
+        tiers.append(MemoryParseCache(max_bytes))
+    if backend in ("sqlite", "tiered"):
+        tiers.append(SQLiteParseCache(path))
+    return ParseCache(tiers)
+
+
+def get_parse_cache() -> ParseCache:
+    global _parse_cache
+    if _parse_cache is None:
+        _parse_cache = initialize_parse_cache()
+    return _parse_cache
@@ -1,11 +1,39 @@
 import re
 import os
+import threading
+from collections import Counter
 from PyPDF2 import PdfReader
 import docx2txt
 from pdfminer.high_level import extract_text
-from typing import Optional
-from llama.llama_utils import parse_resume_with_llama
+from typing import Any, Dict, List, Optional, Tuple
+from llama.llama_utils import acquire_llama_parser, parse_resume_with_llama
 from llama_parse import LlamaParse
+from utils.common_utils import get_env_float
+from utils.metrics_utils import observe_stage, record_fallback
+
+# Pages with fewer visible characters than this are treated as image-only
+MIN_PAGE_CHARS = 40
+# Characters per page at which a page counts as "fully" extracted
+TARGET_CHARS_PER_PAGE = 600
+
+# How often each parse path is taken, so double-paying for failures shows up
+_parse_counts: Counter = Counter()
+_parse_counts_lock = threading.Lock()
+
+# Outcomes where local extraction stood in for LlamaParse
+FALLBACK_OUTCOMES = ("local_no_parser", "local_after_llamaparse_failure", "local_first_llamaparse_failure")
+
+
+def _count_parse(outcome: str) -> None:
+    with _parse_counts_lock:
+        _parse_counts[outcome] += 1
+    if outcome in FALLBACK_OUTCOMES:
+        record_fallback(outcome)
+
+
+def get_parse_stats() -> Dict[str, int]:
+    with _parse_counts_lock:
+        return dict(_parse_counts)
 
 
 def extract_email(resume_text: str) -> str:
@@ -13,15 +41,17 @@ def extract_email(resume_text: str) -> str:
     match = re.search(email_pattern, resume_text)
     return match.group(0) if match else "No email found"
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_pdf_pages(file_path: str) -> List[str]:
     try:
         with open(file_path, "rb") as f:
             reader = PdfReader(f)
-            text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-        return text
+            return [page.extract_text() or "" for page in reader.pages]
     except Exception as e:
         raise Exception(f"Error extracting PDF: {e}")
 
+def extract_text_from_pdf(file_path: str) -> str:
+    return "\n".join(page for page in extract_pdf_pages(file_path) if page)
+
 def extract_text_from_docx(file_path: str) -> str:
     try:
         return docx2txt.process(file_path)
@@ -35,20 +65,125 @@ def parse_resume(file_path: str, parser: LlamaParse) -> str:
     :param parser: LlamaParse instance
     :return: Resume text
     """
+    return parse_resume_with_source(file_path, parser)[0]
+
+def parse_resume_with_source(file_path: str, parser: LlamaParse) -> Tuple[str, str]:
+    """
+    Same as parse_resume, but also reports which parser produced the text.
+    :param file_path: Resume path
+    :param parser: LlamaParse instance
+    :return: (resume text, 'llamaparse' or 'local')
+    """
+    if not parser:
+        _count_parse("local_no_parser")
+        return extract_text(file_path), "local"
     try:
-        if parser:
-            return parse_resume_with_llama(file_path, parser)
+        text = parse_resume_with_llama(file_path, parser)
+        _count_parse("llamaparse")
+        return text, "llamaparse"
     except Exception:
-        pass
-    return extract_text(file_path)
+        _count_parse("local_after_llamaparse_failure")
+    return extract_text(file_path), "local"
 
 def extract_text(file_path: str) -> str:
     ext = os.path.splitext(file_path)[-1].lower()
     if ext == ".pdf":
-        return extract_text_from_pdf(file_path)
+        with observe_stage("local_extract"):
+            return extract_text_from_pdf(file_path)
     elif ext == ".docx":
-        return extract_text_from_docx(file_path)
+        with observe_stage("local_extract"):
+            return extract_text_from_docx(file_path)
     # elif ext == ".doc":
     #     return extract_text_from_doc(file_path)
     else:
-        raise Exception("Unsupported file type.")
\ No newline at end of file
+        raise Exception("Unsupported file type.")
+
+def score_text_quality(pages: List[str]) -> Dict[str, Any]:
+    """
+    Cheap heuristic for how usable locally extracted text is.
+    Combines characters per page, the share of printable characters
+    (pdf garbage like '\ufffd' or '(cid:12)' counts against it) and the
+    share of pages that look image-only.
+    :param pages: Extracted text per page (a DOCX counts as one page)
+    :return: Dict with 'score' in [0, 1] and its components
+    """
+    page_count = max(len(pages), 1)
+    text = "".join(pages)
+    total_chars = len(text)
+    if total_chars == 0:
+        return {"score": 0.0, "pages": page_count, "chars_per_page": 0.0,
+                "printable_ratio": 0.0, "image_only_pages": page_count}
+
+    garbage = text.count("\ufffd") + 8 * len(re.findall(r"\(cid:\d+\)", text))
+    printable = sum(1 for ch in text if ch.isprintable() or ch.isspace())
+    printable_ratio = max(0.0, (printable - garbage) / total_chars)
+
+    visible_per_page = [len("".join(page.split())) for page in pages] or [0]
+    image_only_pages = sum(1 for chars in visible_per_page if chars < MIN_PAGE_CHARS)
+    chars_per_page = sum(visible_per_page) / page_count
+
+    density = min(1.0, chars_per_page / TARGET_CHARS_PER_PAGE)
+    coverage = 1.0 - image_only_pages / page_count
+    return {
+        "score": round(density * printable_ratio * coverage, 3),
+        "pages": page_count,
+        "chars_per_page": round(chars_per_page, 1),
+        "printable_ratio": round(printable_ratio, 3),
+        "image_only_pages": image_only_pages,
+    }
+
+def extract_text_with_quality(file_path: str) -> Tuple[str, Dict[str, Any]]:
+    ext = os.path.splitext(file_path)[-1].lower()
+    if ext == ".pdf":
+        with observe_stage("local_extract"):
+            pages = extract_pdf_pages(file_path)
+    elif ext == ".docx":
+        with observe_stage("local_extract"):
+            pages = [extract_text_from_docx(file_path) or ""]
+    else:
+        raise Exception("Unsupported file type.")
+    return "\n".join(page for page in pages if page), score_text_quality(pages)
+
+def parse_resume_local_first(file_path: str, threshold: Optional[float] = None) -> Tuple[str, str]:
+    """
+    Extract locally and only escalate to LlamaParse when the text quality
+    score is below the threshold (PARSE_QUALITY_THRESHOLD, default 0.5).
+    :param file_path: Resume path
+    :param threshold: Override for the quality threshold
+    :return: (resume text, 'llamaparse' or 'local')
+    """
+    if threshold is None:
+        threshold = get_env_float("PARSE_QUALITY_THRESHOLD", 0.5)
+    try:
+        text, quality = extract_text_with_quality(file_path)
+    except Exception:
+        text, quality = "", {"score": 0.0}
+
+    if text and quality["score"] >= threshold:
+        _count_parse("local_first_accepted")
+        return text, "local"
+
+    with acquire_llama_parser() as parser:
+        if parser:
+            try:
+                llama_text = parse_resume_with_llama(file_path, parser)
+                _count_parse("local_first_escalated")
+                return llama_text, "llamaparse"
+            except Exception:
+                _count_parse("local_first_llamaparse_failure")
+
+    # Low-quality local text still beats nothing
+    _count_parse("local_first_low_quality")
+    return text, "local"
+
+def parse_resume_file(file_path: str) -> Tuple[str, str]:
+    """
+    Parse a resume according to PARSE_MODE:
+      llama_first (default) - LlamaParse, local extraction if it fails
+      local_first           - local extraction, LlamaParse only for poor text
+    :return: (resume text, parser that produced it)
+    """
+    if os.getenv("PARSE_MODE", "llama_first").lower() == "local_first":
+        return parse_resume_local_first(file_path)
+    with acquire_llama_parser() as parser:
+        return parse_resume_with_source(file_path, parser)
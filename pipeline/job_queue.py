@@ -0,0 +1,171 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Set
+
+from mongodb.mongodb_jobs import (
+    claim_next_job,
+    defer_job,
+    finish_job,
+    is_cancel_requested,
+    recover_stale_jobs,
+    release_jobs_on_shutdown,
+    renew_lease,
+)
+from utils.common_utils import get_env_int
+from utils.governor_utils import ProviderUnavailable, backoff_delay
+
+
+class JobCancelled(Exception):
+    """Raised by a job's checkpoint when cancellation was requested."""
+
+
+class JobContext:
+    """Handed to the job handler so it can checkpoint between stages."""
+
+    def __init__(self, job: Dict, lease_seconds: int):
+        self.job = job
+        self.lease_seconds = lease_seconds
+
+    async def checkpoint(self) -> None:
+        """Stop here if the job was cancelled; otherwise extend the lease."""
+        if await is_cancel_requested(self.job["job_id"]):
+            raise JobCancelled()
+        await renew_lease(self.job["job_id"], self.lease_seconds)
+
+
+class JobWorkerPool:
+    """
+    Bounded set of worker coroutines draining the analysis_jobs queue.
+    Workers claim jobs from MongoDB, so several API processes can share
+    one queue; notify() wakes them up as soon as a job is enqueued here,
+    otherwise they poll every poll_interval seconds.
+    :param handler: Coroutine (job, JobContext) -> dict of result fields
+    """
+
+    def __init__(self, handler: Callable[[Dict, JobContext], Awaitable[Dict[str, Any]]],
+                 workers: int, lease_seconds: int, max_attempts: int, poll_interval: float,
+                 max_deferrals: int = 20, retry_base: float = 5.0, retry_cap: float = 300.0):
+        self.handler = handler
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.max_deferrals = max_deferrals
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self._wakeup = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+        self._running_jobs: Set[str] = set()
+        self._stopping = False
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.deferred = 0
+
+    async def start(self) -> None:
+        recovered = await recover_stale_jobs(self.max_attempts)
+        if any(recovered.values()):
+            print(f"Recovered analysis jobs: {recovered}")
+        for index in range(self.workers):
+            self._tasks.add(asyncio.create_task(self._worker(), name=f"job-worker-{index}"))
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        # Whatever was in flight goes back to the queue for the next process
+        await release_jobs_on_shutdown(self._running_jobs)
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            try:
+                job = await claim_next_job(self.lease_seconds)
+            except Exception as e:
+                print(f"Failed to claim analysis job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except Exception as e:
+                # Recording the outcome failed (e.g. Mongo down). Keep the worker
+                # alive; the job's lease runs out and it is recovered later.
+                print(f"Analysis job {job.get('job_id')} could not be finished: {e}")
+
+    async def _defer(self, job: Dict, error: ProviderUnavailable) -> None:
+        deferrals = job.get("deferrals") or 0
+        if deferrals >= self.max_deferrals:
+            await finish_job(job["job_id"], "failed", error=str(error))
+            self.failed += 1
+            return
+        delay = error.retry_after + backoff_delay(deferrals, self.retry_base, self.retry_cap)
+        print(f"Analysis job {job['job_id']} deferred {delay:.0f}s: {error}")
+        await defer_job(job["job_id"], delay, str(error))
+        self.deferred += 1
+
+    async def _run(self, job: Dict) -> None:
+        job_id = job["job_id"]
+        self._running_jobs.add(job_id)
+        shutting_down = False
+        try:
+            context = JobContext(job, self.lease_seconds)
+            await context.checkpoint()
+            result = await self.handler(job, context)
+            await finish_job(job_id, "completed", **result)
+            self.completed += 1
+        except JobCancelled:
+            await finish_job(job_id, "cancelled")
+            self.cancelled += 1
+        except asyncio.CancelledError:
+            # Shutdown: keep it in _running_jobs so stop() can requeue it
+            shutting_down = True
+            raise
+        except ProviderUnavailable as e:
+            # Provider outage: wait it out in the queue rather than fail the job
+            await self._defer(job, e)
+        except Exception as e:
+            print(f"Analysis job {job_id} failed: {e}")
+            await finish_job(job_id, "failed", error=str(e))
+            self.failed += 1
+        finally:
+            if not shutting_down:
+                self._running_jobs.discard(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._tasks),
+            "in_flight": len(self._running_jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "deferred": self.deferred,
+        }
+
+
+def create_job_worker_pool(handler: Callable[[Dict, JobContext], Awaitable[Dict[str, Any]]]) -> JobWorkerPool:
+    """
+    Pool sized from the environment: JOB_WORKERS (4), JOB_LEASE_SECONDS
+    (600), JOB_MAX_ATTEMPTS (3) and JOB_POLL_INTERVAL seconds (2). Jobs a
+    provider refused are requeued up to JOB_MAX_DEFERRALS (20) times, after
+    backoff between JOB_RETRY_BASE (5) and JOB_RETRY_CAP (300) seconds.
+    """
+    return JobWorkerPool(
+        handler,
+        workers=max(1, get_env_int("JOB_WORKERS", 4)),
+        lease_seconds=max(30, get_env_int("JOB_LEASE_SECONDS", 600)),
+        max_attempts=max(1, get_env_int("JOB_MAX_ATTEMPTS", 3)),
+        poll_interval=max(1, get_env_int("JOB_POLL_INTERVAL", 2)),
+        max_deferrals=max(0, get_env_int("JOB_MAX_DEFERRALS", 20)),
+        retry_base=max(1, get_env_int("JOB_RETRY_BASE", 5)),
+        retry_cap=max(1, get_env_int("JOB_RETRY_CAP", 300)),
+    )
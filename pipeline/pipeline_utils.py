@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from utils.common_utils import get_env_int
+from utils.executor_utils import run_in_executor
+from utils.metrics_utils import ANALYSES_IN_FLIGHT
+
+
+def get_stage_concurrency(stage: str, default: int) -> int:
+    """
+    Read the concurrency limit for a batch stage from BATCH_<STAGE>_CONCURRENCY.
+    :param stage: 'parse', 'analyze' or 'store'
+    :param default: Value used when the variable is unset or invalid
+    :return: Concurrency limit (at least 1)
+    """
+    return max(1, get_env_int(f"BATCH_{stage.upper()}_CONCURRENCY", default))
+
+
+async def run_resume_pipeline(
+    files: List[Tuple[str, bytes]],
+    parse_fn: Callable[[str, bytes], str],
+    analyze_fn: Callable[[str, bytes, str], Dict[str, Any]],
+    store_fn: Callable[[str, bytes, str, Dict[str, Any]], Any],
+    parse_concurrency: int,
+    analyze_concurrency: int,
+    store_concurrency: int,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run parse -> analyze -> store for many resumes as pipelined stages.
+    Every stage has its own concurrency bound, so a file moves on to the
+    next stage as soon as it is done with the previous one. Results are
+    yielded in completion order, one dict per file.
+    :param files: List of (filename, content) tuples
+    :param parse_fn: Blocking function returning the resume text (parse pool)
+    :param analyze_fn: Blocking function returning the analysis dict (llm pool)
+    :param store_fn: Coroutine function, or blocking function run on the db
+        pool, returning the stored analysis id
+    :return: Async iterator of per-file result dicts
+    """
+    parse_sem = asyncio.Semaphore(parse_concurrency)
+    analyze_sem = asyncio.Semaphore(analyze_concurrency)
+    store_sem = asyncio.Semaphore(store_concurrency)
+
+    async def process(index: int, filename: str, content: bytes) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index, "filename": filename}
+        with ANALYSES_IN_FLIGHT.track_inprogress():
+            try:
+                async with parse_sem:
+                    resume_text = await run_in_executor("parse", parse_fn, filename, content)
+                if not resume_text:
+                    raise ValueError("Failed to parse resume text")
+
+                async with analyze_sem:
+                    analysis = await run_in_executor("llm", analyze_fn, filename, content, resume_text)
+
+                async with store_sem:
+                    if asyncio.iscoroutinefunction(store_fn):
+                        analysis_id = await store_fn(filename, content, resume_text, analysis)
+                    else:
+                        analysis_id = await run_in_executor(
+                            "db", store_fn, filename, content, resume_text, analysis
+                        )
+
+                result.update({"status": "ok", "analysis_id": analysis_id, "analysis": analysis})
+            except Exception as e:
+                result.update({"status": "error", "error": str(e)})
+        return result
+
+    tasks = [
+        asyncio.create_task(process(index, filename, content))
+        for index, (filename, content) in enumerate(files)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away or the generator was closed early
+        for task in tasks:
+            task.cancel()
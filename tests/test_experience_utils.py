@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from utils.experience_utils import (
+    compute_experience,
+    covered_months,
+    experience_matches,
+    month_index,
+    parse_duration,
+    parse_experience_range,
+    parse_month,
+    parse_months_text,
+)
+
+TODAY = month_index(2024, 6)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("01/2020", month_index(2020, 1)),
+    ("1-2020", month_index(2020, 1)),
+    ("Jan 2020", month_index(2020, 1)),
+    ("September, 2019", month_index(2019, 9)),
+    ("Sept. 2019", month_index(2019, 9)),
+    ("2018", month_index(2018, 1)),
+    ("Present", TODAY),
+    ("13/2020", None),
+    ("sometime", None),
+    (None, None),
+])
+def test_parse_month(value, expected):
+    assert parse_month(value, TODAY) == expected
+
+
+@pytest.mark.parametrize("duration, expected", [
+    ("01/2020 - 06/2022", (month_index(2020, 1), month_index(2022, 6))),
+    ("Jan 2020 to Present", (month_index(2020, 1), TODAY)),
+    ("2019–2021", (month_index(2019, 1), month_index(2021, 1))),
+    ("06/2022 - 01/2020", None),
+    ("01/2020", None),
+])
+def test_parse_duration(duration, expected):
+    assert parse_duration(duration, TODAY) == expected
+
+
+def test_overlapping_positions_are_counted_once():
+    starts = [month_index(2020, 1), month_index(2021, 1), month_index(2023, 1)]
+    ends = [month_index(2021, 6), month_index(2022, 1), month_index(2023, 7)]
+    # 2020-01..2022-01 merged (24) + 2023-01..2023-07 (6)
+    assert covered_months(starts, ends) == 30
+
+
+def test_no_positions_cover_nothing():
+    assert covered_months([], []) == 0
+
+
+@pytest.mark.parametrize("required, expected", [
+    ("3-5", (3.0, 5.0)),
+    ("4+", (4.0, float("inf"))),
+    ("5 years", (5.0, float("inf"))),
+    ("2.5-4 yrs", (2.5, 4.0)),
+    ("", None),
+    ("senior", None),
+])
+def test_parse_experience_range(required, expected):
+    assert parse_experience_range(required) == expected
+
+
+def test_experience_matches_scalar_and_array():
+    assert experience_matches(48, "3-5") is True
+    assert experience_matches(48, "") is False
+    result = experience_matches(np.array([24, 36, 60, 72]), "3-5")
+    assert result.tolist() == [False, True, True, False]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2 years 5 months", 29),
+    ("3 yrs", 36),
+    ("7 months", 7),
+    ("N/A", None),
+])
+def test_parse_months_text(text, expected):
+    assert parse_months_text(text) == expected
+
+
+def test_compute_experience_skips_internships_and_undated_positions():
+    positions = [
+        {"duration": "01/2020 - 01/2022"},
+        {"duration": "06/2021 - 06/2023"},
+        {"duration": "01/2019 - 06/2019", "is_internship": True},
+        {"duration": "unknown"},
+        {"duration": "01/2018 - 01/2019", "duration_missing": True},
+    ]
+    result = compute_experience(positions, "3-5", today=TODAY)
+    assert result == {"total_months": 41, "counted_positions": 2, "experience_match": True}
+    assert positions[0]["duration_length"] == "2 years"
+    assert positions[1]["duration_length"] == "2 years"
+    assert positions[2]["duration_length"] == "0 years 5 months"
+    assert positions[3]["duration_length"] == "N/A"
+    assert positions[4]["duration_length"] == "N/A"
@@ -0,0 +1,80 @@
+import pytest
+
+from utils.skill_utils import AhoCorasick, load_skill_synonyms, match_skills
+
+
+@pytest.fixture(autouse=True)
+def default_synonyms(monkeypatch):
+    monkeypatch.delenv("SKILL_SYNONYMS_PATH", raising=False)
+    load_skill_synonyms.cache_clear()
+    yield
+    load_skill_synonyms.cache_clear()
+
+
+def jd(primary, secondary=()):
+    return {"primary_skills": list(primary), "secondary_skills": list(secondary)}
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    matches = set(AhoCorasick(["java", "javascript", "script"]).iter_matches("javascript"))
+    assert matches == {(3, "java"), (9, "javascript"), (9, "script")}
+
+
+@pytest.mark.parametrize("skill, text", [
+    ("Java", "Built front ends in JavaScript"),
+    ("C", "Ten years of C++ and C#"),
+    ("Go", "Worked on Google Cloud"),
+    ("SQL", "Tuned PostgreSQL and MySQL queries"),
+])
+def test_skill_inside_a_longer_word_does_not_match(skill, text):
+    assert match_skills(text, jd([skill]))["matching_skills"] == []
+
+
+@pytest.mark.parametrize("skill, text", [
+    ("Java", "Java, Spring and Kafka"),
+    ("C++", "Systems work in C++."),
+    ("C#", "Desktop apps (C#/WPF)"),
+    ("Node.js", "REST services on node.js"),
+    ("Machine Learning", "Applied machine\nlearning to churn"),
+])
+def test_skill_bounded_by_punctuation_or_whitespace_matches(skill, text):
+    assert match_skills(text, jd([skill]))["matching_skills"] == [skill]
+
+
+@pytest.mark.parametrize("skill, text", [
+    ("Go", "Backend services in Golang"),
+    ("Golang", "Backend services in Go and Rust"),
+    ("Golang", "Go lang microservices"),
+    ("Kubernetes", "Deployed on k8s"),
+    ("Amazon Web Services", "Lambda and S3 on AWS"),
+    ("AWS", "Certified in Amazon Web Services"),
+    ("PostgreSQL", "Postgres replication"),
+])
+def test_synonyms_match_in_both_directions(skill, text):
+    assert match_skills(text, jd([skill]))["matching_skills"] == [skill]
+
+
+def test_match_is_case_insensitive():
+    assert match_skills("PYTHON and docker", jd(["Python", "Docker"]))["match_score"] == 100
+
+
+def test_score_counts_primary_skills_only():
+    result = match_skills("Python, Redis", jd(["Python", "Go"], ["Redis", "Kafka"]))
+    assert result["match_score"] == 50
+    assert result["matching_skills"] == ["Python"]
+    assert result["missing_primary_skills"] == ["Go"]
+    assert result["matching_secondary_skills"] == ["Redis"]
+    assert result["missing_secondary_skills"] == ["Kafka"]
+
+
+def test_no_primary_skills_scores_zero():
+    assert match_skills("Python", jd([]))["match_score"] == 0
+
+
+def test_synonyms_file_extends_defaults(tmp_path, monkeypatch):
+    path = tmp_path / "synonyms.json"
+    path.write_text('{"Terraform": ["tf"]}', encoding="utf-8")
+    monkeypatch.setenv("SKILL_SYNONYMS_PATH", str(path))
+    load_skill_synonyms.cache_clear()
+    text = "Infra as code with tf on k8s"
+    assert match_skills(text, jd(["Terraform", "Kubernetes"]))["match_score"] == 100
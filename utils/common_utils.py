@@ -5,6 +5,7 @@
 #         return name
 #     return ' '.join(word.capitalize() for word in name.split())
 
+import os
 from typing import Optional
 
 def to_init_caps(name: Optional[str]) -> Optional[str]:
@@ -19,3 +20,21 @@ def to_init_caps(name: Optional[str]) -> Optional[str]:
         return word[:1].upper() + word[1:].lower()
 
     return ' '.join(format_word(word) for word in name.split())
+
+def get_env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+def get_env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
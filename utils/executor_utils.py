@@ -0,0 +1,68 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from utils.common_utils import get_env_int
+
+# Executor name -> default worker count. Override with <NAME>_POOL_SIZE,
+# e.g. PARSE_POOL_SIZE=8 or LLM_POOL_SIZE=32.
+EXECUTOR_DEFAULTS: Dict[str, int] = {
+    "parse": 4,   # temp file + LlamaParse / PyPDF2 / docx2txt
+    "llm": 16,    # Gemini generate_content (network bound)
+    "db": 8,      # blocking pymongo calls
+}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+def initialize_executors() -> Dict[str, ThreadPoolExecutor]:
+    """
+    Create one sized thread pool per blocking stage. Safe to call twice.
+    :return: Mapping of executor name to pool
+    """
+    for name, default in EXECUTOR_DEFAULTS.items():
+        if name not in _executors:
+            size = max(1, get_env_int(f"{name.upper()}_POOL_SIZE", default))
+            _executors[name] = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"{name}-pool")
+    return _executors
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    if name not in _executors:
+        initialize_executors()
+    try:
+        return _executors[name]
+    except KeyError:
+        raise ValueError(f"Unknown executor: {name}")
+
+
+async def run_in_executor(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking function on the named pool without blocking the event loop.
+    :param name: 'parse', 'llm' or 'db'
+    :param fn: Blocking callable
+    :return: Whatever fn returns
+    """
+    loop = asyncio.get_running_loop()
+    # Carry context variables into the worker thread like asyncio.to_thread does
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(name), call)
+
+
+def get_executor_stats() -> Dict[str, Dict[str, int]]:
+    return {
+        name: {
+            "max_workers": executor._max_workers,
+            "queued": executor._work_queue.qsize(),
+        }
+        for name, executor in _executors.items()
+    }
+
+
+def shutdown_executors() -> None:
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
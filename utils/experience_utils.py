@@ -0,0 +1,173 @@
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Deterministic experience arithmetic: the model only extracts position
+# dates, everything else (durations, overlap-merged totals, matching
+# against the JD's required_experience) is computed here.
+#
+# Dates are month indexes (year * 12 + month - 1) and a position covers
+# the half-open range [start, end), so "01/2020 - 06/2022" is 29 months,
+# the same convention the prompt used to ask the model for.
+
+_MONTH_NAMES = {
+    name: number
+    for number, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ], start=1)
+    for name in names
+}
+_PRESENT = {"present", "current", "now", "till date", "to date", "ongoing", "present (current)"}
+
+_NUMERIC_DATE = re.compile(r"^(\d{1,2})[/.\-](\d{4})$")
+_NAMED_DATE = re.compile(r"^([a-z]+)\.?,?\s*'?(\d{4})$")
+_YEAR_ONLY = re.compile(r"^(\d{4})$")
+_RANGE_SEPARATOR = re.compile(r"\s+(?:-|–|—|to)\s+|\s*[–—]\s*|(?<=\d{4})\s*-\s*(?=[a-z0-9])", re.IGNORECASE)
+_MONTHS_TEXT = re.compile(r"^(?:(\d+)\s*(?:years?|yrs?))?\s*(?:(\d+)\s*months?)?$")
+_EXPERIENCE_RANGE = re.compile(r"^(\d+(?:\.\d+)?)(?:(\+)|-(\d+(?:\.\d+)?))?$")
+
+
+def month_index(year: int, month: int) -> int:
+    return year * 12 + month - 1
+
+
+def current_month_index(today: Optional[datetime] = None) -> int:
+    today = today or datetime.now()
+    return month_index(today.year, today.month)
+
+
+def parse_month(value: Optional[str], today: Optional[int] = None) -> Optional[int]:
+    """
+    Month index for 'MM/YYYY', 'Jan 2020', 'January, 2020', 'YYYY' (taken
+    as January) or 'Present'. None if the value can't be read.
+    """
+    if not value:
+        return None
+    text = " ".join(str(value).strip().lower().split())
+    if text in _PRESENT or text.startswith("present"):
+        return current_month_index() if today is None else today
+    match = _NUMERIC_DATE.match(text)
+    if match:
+        month, year = int(match.group(1)), int(match.group(2))
+        return month_index(year, month) if 1 <= month <= 12 else None
+    match = _NAMED_DATE.match(text)
+    if match and match.group(1) in _MONTH_NAMES:
+        return month_index(int(match.group(2)), _MONTH_NAMES[match.group(1)])
+    match = _YEAR_ONLY.match(text)
+    if match:
+        return month_index(int(match.group(1)), 1)
+    return None
+
+
+def parse_duration(duration: Optional[str], today: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """(start, end) month indexes for '01/2020 - 06/2022' style ranges."""
+    if not duration:
+        return None
+    parts = _RANGE_SEPARATOR.split(str(duration).strip(), maxsplit=1)
+    if len(parts) != 2:
+        return None
+    start, end = parse_month(parts[0], today), parse_month(parts[1], today)
+    if start is None or end is None or end < start:
+        return None
+    return start, end
+
+
+def merge_intervals(starts: Sequence[int], ends: Sequence[int]) -> np.ndarray:
+    """
+    Merge overlapping/adjacent [start, end) intervals.
+    :return: (n, 2) array of disjoint intervals sorted by start
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if starts.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    # A new group starts where an interval begins after everything before it ended
+    new_group = np.empty(starts.size, dtype=bool)
+    new_group[0] = True
+    new_group[1:] = starts[1:] > reach[:-1]
+    group_starts = np.flatnonzero(new_group)
+    group_ends = np.append(group_starts[1:], starts.size) - 1
+    return np.column_stack((starts[group_starts], reach[group_ends]))
+
+
+def covered_months(starts: Sequence[int], ends: Sequence[int]) -> int:
+    merged = merge_intervals(starts, ends)
+    return int((merged[:, 1] - merged[:, 0]).sum())
+
+
+def format_months(months: int) -> str:
+    years, months = divmod(int(months), 12)
+    return f"{years} years {months} months" if months else f"{years} years"
+
+
+def parse_months_text(value: Optional[str]) -> Optional[int]:
+    """Months in a '2 years 5 months' style string, None if there are no numbers."""
+    match = _MONTHS_TEXT.match(str(value or "").strip().lower())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    return int(match.group(1) or 0) * 12 + int(match.group(2) or 0)
+
+
+def parse_experience_range(required: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    (min_years, max_years) for '3-5', '4+' or '5' (meaning 5 or more).
+    None when there is no usable requirement.
+    """
+    text = re.sub(r"\s+", "", str(required or "")).lower()
+    text = re.sub(r"(years?|yrs?)$", "", text)
+    match = _EXPERIENCE_RANGE.match(text)
+    if not match:
+        return None
+    low = float(match.group(1))
+    high = float(match.group(3)) if match.group(3) else float("inf")
+    return low, high
+
+
+def experience_matches(total_months, required: Optional[str]):
+    """
+    Vectorized experience_match: total_months may be a scalar or an array
+    (e.g. every stored candidate for a JD). No requirement -> False, as before.
+    """
+    months = np.asarray(total_months, dtype=np.float64)
+    bounds = parse_experience_range(required)
+    if bounds is None:
+        result = np.zeros(months.shape, dtype=bool)
+    else:
+        years = months / 12
+        result = (years >= bounds[0]) & (years <= bounds[1])
+    return bool(result) if result.ndim == 0 else result
+
+
+def compute_experience(positions: Iterable[Dict], required: Optional[str],
+                       today: Optional[int] = None) -> Dict:
+    """
+    Fill duration_length on every dated position and compute the
+    overlap-merged total of non-internship months.
+    :return: {"total_months", "counted_positions", "experience_match"}
+    """
+    today = current_month_index() if today is None else today
+    starts: List[int] = []
+    ends: List[int] = []
+    for position in positions:
+        span = None if position.get("duration_missing") else parse_duration(position.get("duration"), today)
+        if span is None:
+            position["duration_length"] = position.get("duration_length") or "N/A"
+            continue
+        position["duration_length"] = format_months(span[1] - span[0])
+        if not position.get("is_internship", False):
+            starts.append(span[0])
+            ends.append(span[1])
+
+    total_months = covered_months(starts, ends)
+    return {
+        "total_months": total_months,
+        "counted_positions": len(starts),
+        "experience_match": experience_matches(total_months, required),
+    }
@@ -0,0 +1,328 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.common_utils import get_env_float
+
+# Shared guard around the external providers (Gemini, LlamaParse). Every
+# call goes through, in order:
+#   circuit breaker  - fail fast while the provider is down
+#   token bucket     - stay under the provider's request rate
+#   AIMD limiter     - concurrency that grows while calls are fast and
+#                      succeed, and is cut back on 429/5xx or slow calls
+# and retryable failures are retried with jittered exponential backoff.
+
+# Per-provider defaults; each can be overridden with <PROVIDER>_<SETTING>,
+# e.g. GEMINI_RATE_PER_SEC or LLAMA_MAX_CONCURRENCY. Every setting is read
+# as a float (GEMINI_RATE_PER_SEC=0.25 is 15 requests a minute); counts
+# are truncated to ints by Governor.
+GOVERNOR_DEFAULTS: Dict[str, Dict[str, float]] = {
+    "gemini": {
+        "RATE_PER_SEC": 10.0, "BURST": 10.0,
+        "MIN_CONCURRENCY": 1, "MAX_CONCURRENCY": 16,
+        "LATENCY_TARGET_MS": 30000,
+        "MAX_RETRIES": 3, "BACKOFF_BASE": 1.0, "BACKOFF_CAP": 20.0,
+        "BREAKER_THRESHOLD": 5, "BREAKER_RESET": 30,
+        "ACQUIRE_TIMEOUT": 60,
+    },
+    # Parsing falls back to local extraction, so retry less and give up sooner
+    "llama": {
+        "RATE_PER_SEC": 5.0, "BURST": 5.0,
+        "MIN_CONCURRENCY": 1, "MAX_CONCURRENCY": 8,
+        "LATENCY_TARGET_MS": 60000,
+        "MAX_RETRIES": 1, "BACKOFF_BASE": 1.0, "BACKOFF_CAP": 10.0,
+        "BREAKER_THRESHOLD": 5, "BREAKER_RESET": 60,
+        "ACQUIRE_TIMEOUT": 30,
+    },
+}
+
+_RETRYABLE_MARKERS = (
+    "429", "rate limit", "quota", "resource exhausted", "resource_exhausted",
+    "500 internal", "502", "503", "504", "unavailable", "overloaded", "timed out", "timeout",
+)
+
+
+class ProviderUnavailable(Exception):
+    """A call was refused without reaching the provider."""
+
+    def __init__(self, provider: str, reason: str, retry_after: float):
+        super().__init__(f"{provider} unavailable ({reason}), retry in {retry_after:.0f}s")
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    # google.api_core errors carry the HTTP status in .code; httpx/requests
+    # errors on .status_code or .response.status_code
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("code", "status_code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """429s, 5xx, timeouts and dropped connections; anything else is the caller's problem."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    message = str(error).lower()
+    return any(marker in message for marker in _RETRYABLE_MARKERS)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; rate <= 0 disables it."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float) -> bool:
+        if self.rate <= 0:
+            return True
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining))
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit with additive increase / multiplicative decrease.
+    A fast success adds about one slot per `limit` completed calls; a
+    throttled or slow call multiplies the limit by backoff_ratio (at most
+    once per cooldown, so one burst of 429s counts as one signal).
+    """
+
+    def __init__(self, min_limit: int, max_limit: int, latency_target_ms: float,
+                 backoff_ratio: float = 0.7, cooldown_seconds: float = 1.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_target_ms = latency_target_ms
+        self.backoff_ratio = backoff_ratio
+        self.cooldown_seconds = cooldown_seconds
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency_ms: float, outcome: str) -> None:
+        """:param outcome: 'ok', 'throttled', or anything else to leave the limit alone"""
+        with self._cond:
+            self.in_flight -= 1
+            slow = self.latency_target_ms > 0 and latency_ms > self.latency_target_ms
+            if outcome == "throttled" or (outcome == "ok" and slow):
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown_seconds:
+                    self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                    self._last_decrease = now
+            elif outcome == "ok":
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """
+    closed -> open after failure_threshold consecutive failures; after
+    reset_seconds one trial call is let through (half-open) and its result
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opens = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _update(self) -> None:
+        if self.state == "open" and time.monotonic() >= self._opened_at + self.reset_seconds:
+            self.state = "half_open"
+            self._trial_in_flight = False
+
+    def is_open(self) -> bool:
+        with self._lock:
+            self._update()
+            return self.state == "open" or (self.state == "half_open" and self._trial_in_flight)
+
+    def allow(self) -> bool:
+        """Claim permission for one call (the trial call when half-open)."""
+        with self._lock:
+            self._update()
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self.state != "open":
+                return 1.0
+            return max(1.0, self._opened_at + self.reset_seconds - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opens += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class Governor:
+    """Rate limit, adaptive concurrency, retries and circuit breaking for one provider."""
+
+    def __init__(self, name: str, settings: Dict[str, float]):
+        self.name = name
+        self.max_retries = int(settings["MAX_RETRIES"])
+        self.backoff_base = settings["BACKOFF_BASE"]
+        self.backoff_cap = settings["BACKOFF_CAP"]
+        self.acquire_timeout = settings["ACQUIRE_TIMEOUT"]
+        self.bucket = TokenBucket(settings["RATE_PER_SEC"], settings["BURST"])
+        self.limiter = AIMDLimiter(
+            int(settings["MIN_CONCURRENCY"]), int(settings["MAX_CONCURRENCY"]), settings["LATENCY_TARGET_MS"]
+        )
+        self.breaker = CircuitBreaker(int(settings["BREAKER_THRESHOLD"]), settings["BREAKER_RESET"])
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "succeeded": 0, "throttled": 0, "retries": 0, "errors": 0, "rejected": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def _reject(self, reason: str, retry_after: float) -> ProviderUnavailable:
+        self._count("rejected")
+        return ProviderUnavailable(self.name, reason, retry_after)
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) under the governor.
+        :raises ProviderUnavailable: Circuit open, or no rate/concurrency
+            capacity within ACQUIRE_TIMEOUT
+        :raises Exception: fn's own error once it isn't retryable or
+            retries are used up
+        """
+        attempt = 0
+        while True:
+            if self.breaker.is_open():
+                raise self._reject("circuit open", self.breaker.retry_after())
+            if not self.bucket.acquire(self.acquire_timeout):
+                raise self._reject("rate limit", 1.0 / max(self.bucket.rate, 1e-6))
+            if not self.limiter.acquire(self.acquire_timeout):
+                raise self._reject("concurrency limit", 1.0)
+            if not self.breaker.allow():
+                self.limiter.release(0, "skipped")
+                raise self._reject("circuit open", self.breaker.retry_after())
+
+            self._count("calls")
+            started = time.monotonic()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            except Exception as e:
+                if not is_retryable_error(e):
+                    raise
+                outcome = "throttled"
+                if attempt >= self.max_retries:
+                    raise
+            finally:
+                self.limiter.release((time.monotonic() - started) * 1000, outcome)
+                if outcome == "throttled":
+                    self._count("throttled")
+                    self.breaker.record_failure()
+                else:
+                    # A non-retryable error still means the provider answered
+                    self._count("succeeded" if outcome == "ok" else "errors")
+                    self.breaker.record_success()
+
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+            attempt += 1
+            self._count("retries")
+            print(f"{self.name} call throttled, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            "circuit": self.breaker.state,
+            "breaker_opens": self.breaker.opens,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "tokens_available": round(self.bucket.available(), 2),
+        }
+
+
+_governors: Dict[str, Governor] = {}
+_governors_lock = threading.Lock()
+
+
+def _load_settings(name: str) -> Dict[str, float]:
+    prefix = name.upper()
+    return {key: get_env_float(f"{prefix}_{key}", default) for key, default in GOVERNOR_DEFAULTS[name].items()}
+
+
+def get_governor(name: str) -> Governor:
+    """Process-wide governor for 'gemini' or 'llama'."""
+    with _governors_lock:
+        if name not in _governors:
+            _governors[name] = Governor(name, _load_settings(name))
+        return _governors[name]
+
+
+def get_governor_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: get_governor(name).stats() for name in GOVERNOR_DEFAULTS}
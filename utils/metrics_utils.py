@@ -0,0 +1,119 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+
+from utils.executor_utils import get_executor_stats
+from utils.tracing_utils import span
+
+# Prometheus metrics for the analysis pipeline, served at /metrics.
+#
+# Counters are labelled by company. Deep code (parsing, Gemini) doesn't
+# know the tenant, so the endpoint sets it once in a context variable;
+# run_in_executor copies the context into the worker threads.
+
+# Seconds; covers sub-ms local steps up to multi-minute LlamaParse jobs
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGES = (
+    "upload_read",
+    "temp_write",
+    "llamaparse",
+    "local_extract",
+    "gemini_call",
+    "response_parse",
+    "mongo_store",
+)
+
+STAGE_SECONDS = Histogram(
+    "resume_stage_seconds",
+    "Time spent in each stage of a resume analysis",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "resume_stage_errors_total",
+    "Stages that raised, by company",
+    ["company", "stage"],
+)
+FALLBACKS = Counter(
+    "resume_fallbacks_total",
+    "Fallback paths taken (e.g. local extraction after LlamaParse failed), by company",
+    ["company", "fallback"],
+)
+CACHE_HITS = Counter(
+    "resume_cache_hits_total",
+    "Parse/analysis cache hits, by company",
+    ["company", "cache"],
+)
+# Export every stage from the first scrape, not only once it has run
+for _stage in STAGES:
+    STAGE_SECONDS.labels(_stage)
+
+ANALYSES_IN_FLIGHT = Gauge(
+    "resume_analyses_in_flight",
+    "Resume analyses currently being processed",
+)
+
+_company: contextvars.ContextVar = contextvars.ContextVar("metrics_company", default="unknown")
+
+
+def set_metrics_company(company_id: str) -> None:
+    """Label metrics recorded from here on (in this request/task) with company_id."""
+    _company.set(company_id or "unknown")
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """
+    Time the block into resume_stage_seconds (and as a span of the current
+    request's trace); count it as an error if it raises.
+    """
+    started = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    except Exception:
+        # Not BaseException: a stream closed early (GeneratorExit) isn't an error
+        STAGE_ERRORS.labels(_company.get(), stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+def record_fallback(fallback: str) -> None:
+    FALLBACKS.labels(_company.get(), fallback).inc()
+
+
+def record_cache_hit(cache: str) -> None:
+    CACHE_HITS.labels(_company.get(), cache).inc()
+
+
+class _ExecutorCollector:
+    """Executor queue depths, read at scrape time."""
+
+    def collect(self):
+        queued = GaugeMetricFamily(
+            "executor_queue_depth", "Tasks waiting for a worker in each executor pool", labels=["executor"]
+        )
+        workers = GaugeMetricFamily(
+            "executor_max_workers", "Worker threads in each executor pool", labels=["executor"]
+        )
+        for name, stats in get_executor_stats().items():
+            queued.add_metric([name], stats["queued"])
+            workers.add_metric([name], stats["max_workers"])
+        yield queued
+        yield workers
+
+
+REGISTRY.register(_ExecutorCollector())
+
+
+def render_metrics() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,155 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+import bcrypt
+
+from utils.common_utils import get_env_int
+from utils.governor_utils import ProviderUnavailable
+
+# bcrypt runs in its own process pool. A hash costs ~250ms of CPU at the
+# default cost, so a burst of logins used to occupy the request threadpool
+# that every sync endpoint shares. The pool takes at most
+# PASSWORD_QUEUE_LIMIT calls (running + waiting); past that callers get
+# ProviderUnavailable, which the API turns into 503 with Retry-After.
+#   PASSWORD_POOL_SIZE    worker processes (default 2)
+#   PASSWORD_QUEUE_LIMIT  calls admitted at once (default 32)
+#   BCRYPT_ROUNDS         cost factor for new hashes (default 12); stored
+#                         hashes with another cost are redone at login
+# Workers are spawned, so a script that imports main and logs users in
+# needs the usual `if __name__ == "__main__":` guard.
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+def get_bcrypt_rounds() -> int:
+    return min(MAX_ROUNDS, max(MIN_ROUNDS, get_env_int("BCRYPT_ROUNDS", 12)))
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """Cost factor of a stored hash ('$2b$12$...' -> 12)."""
+    parts = hashed.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed: str) -> bool:
+    return hash_rounds(hashed) != get_bcrypt_rounds()
+
+
+class PasswordPool:
+    """Process pool for bcrypt with a cap on admitted calls."""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = max(1, workers)
+        self.queue_limit = max(self.workers, queue_limit)
+        self._executor = self._new_executor()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        # Moving average of one call, for Retry-After
+        self.avg_seconds = 0.25
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the API process has threads (executors, Motor) by now
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _done(self, started: float) -> None:
+        with self._lock:
+            self.admitted -= 1
+            self.completed += 1
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.monotonic() - started)
+
+    def submit(self, fn, *args: Any) -> Future:
+        """
+        :raises ProviderUnavailable: queue_limit calls already admitted
+        """
+        with self._lock:
+            if self.admitted >= self.queue_limit:
+                self.rejected += 1
+                # Time for the backlog to drain through the workers
+                retry_after = max(1.0, self.admitted / self.workers * self.avg_seconds)
+                raise ProviderUnavailable("bcrypt", "password hashing queue full", retry_after)
+            self.admitted += 1
+        started = time.monotonic()
+        try:
+            executor = self._executor
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool rather than fail every call
+                with self._lock:
+                    if self._executor is executor:
+                        print("Password pool broken, restarting it")
+                        self._executor = self._new_executor()
+                future = self._executor.submit(fn, *args)
+        except Exception:
+            self._done(started)
+            raise
+        future.add_done_callback(lambda _: self._done(started))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "admitted": self.admitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self.avg_seconds * 1000, 1),
+                "rounds": get_bcrypt_rounds(),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[PasswordPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool() -> PasswordPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PasswordPool(get_env_int("PASSWORD_POOL_SIZE", 2), get_env_int("PASSWORD_QUEUE_LIMIT", 32))
+        return _pool
+
+
+async def hash_password_async(password: str) -> str:
+    """bcrypt hash at BCRYPT_ROUNDS, computed in the password pool."""
+    return await asyncio.wrap_future(get_password_pool().submit(_hash, password, get_bcrypt_rounds()))
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Check a password without holding a thread while the pool works."""
+    return await asyncio.wrap_future(get_password_pool().submit(_check, password, hashed))
+
+
+def get_password_pool_stats() -> Optional[Dict[str, Any]]:
+    return _pool.stats() if _pool is not None else None
+
+
+def shutdown_password_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
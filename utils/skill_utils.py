@@ -0,0 +1,199 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.common_utils import get_env_int
+
+# Local skill matching. Every surface form of every JD skill (the skill
+# itself plus its synonyms) is compiled into one Aho-Corasick automaton,
+# so a resume is scanned once no matter how many skills the JD lists.
+
+# Canonical skill -> other ways resumes write it. Extended/overridden by
+# the JSON file at SKILL_SYNONYMS_PATH (same shape).
+DEFAULT_SKILL_SYNONYMS: Dict[str, List[str]] = {
+    "JavaScript": ["js", "ecmascript", "es6"],
+    "TypeScript": ["ts"],
+    "Node.js": ["node", "nodejs", "node js"],
+    "React": ["reactjs", "react.js", "react js"],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue.js": ["vue", "vuejs"],
+    "Python": ["py", "python3"],
+    "Golang": ["go", "go lang"],
+    "C#": ["csharp", "c sharp"],
+    "C++": ["cpp"],
+    ".NET": ["dotnet", "dot net"],
+    "Kubernetes": ["k8s"],
+    "Amazon Web Services": ["aws"],
+    "Google Cloud Platform": ["gcp", "google cloud"],
+    "Microsoft Azure": ["azure"],
+    "PostgreSQL": ["postgres", "psql"],
+    "MongoDB": ["mongo"],
+    "Machine Learning": ["ml"],
+    "Deep Learning": ["dl"],
+    "Natural Language Processing": ["nlp"],
+    "Artificial Intelligence": ["ai"],
+    "CI/CD": ["cicd", "ci cd", "continuous integration", "continuous delivery"],
+    "REST API": ["restful", "rest apis", "restful apis", "restful api"],
+    "Spring Boot": ["springboot"],
+    "Scikit-learn": ["sklearn", "scikit learn"],
+}
+
+# Characters that make a match part of a longer token ("c" in "c++", "java" in "javascript")
+_WORD_CHARS = set("abcdefghijklmnopqrstuvwxyz0123456789+#")
+
+SCREEN_MODES = ("off", "prefilter", "fast")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+@lru_cache(maxsize=1)
+def load_skill_synonyms() -> Dict[str, Tuple[str, ...]]:
+    """
+    Casefolded surface form -> every surface form in its synonym group.
+    """
+    table = dict(DEFAULT_SKILL_SYNONYMS)
+    path = os.getenv("SKILL_SYNONYMS_PATH")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                table.update(json.load(f))
+        except Exception as e:
+            print(f"Failed to load skill synonyms from {path}: {e}")
+
+    groups: Dict[str, Tuple[str, ...]] = {}
+    for canonical, aliases in table.items():
+        group = tuple(dict.fromkeys(_normalize(form) for form in [canonical, *aliases] if form.strip()))
+        for form in group:
+            groups[form] = group
+    return groups
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every pattern in one pass."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pattern)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """Yield (end_index, pattern) for every match."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in out[state]:
+                yield index, pattern
+
+
+class SkillMatcher:
+    """Compiled matcher for one JD's primary and secondary skills."""
+
+    def __init__(self, primary_skills: List[str], secondary_skills: List[str]):
+        self.primary_skills = [skill for skill in primary_skills if skill and skill.strip()]
+        self.secondary_skills = [skill for skill in secondary_skills if skill and skill.strip()]
+        synonyms = load_skill_synonyms()
+
+        # surface form -> JD skills it stands for
+        self._forms: Dict[str, Set[str]] = {}
+        for skill in self.primary_skills + self.secondary_skills:
+            normalized = _normalize(skill)
+            for form in synonyms.get(normalized, (normalized,)):
+                self._forms.setdefault(form, set()).add(skill)
+        self._automaton = AhoCorasick(self._forms)
+
+    def find(self, resume_text: str) -> Set[str]:
+        """JD skills mentioned anywhere in the resume, as written in the JD."""
+        text = _normalize(resume_text)
+        found: Set[str] = set()
+        for end, form in self._automaton.iter_matches(text):
+            start = end - len(form) + 1
+            before = text[start - 1] if start > 0 else " "
+            after = text[end + 1] if end + 1 < len(text) else " "
+            if before in _WORD_CHARS or after in _WORD_CHARS:
+                continue
+            found.update(self._forms[form])
+        return found
+
+    def analyze(self, resume_text: str) -> Dict:
+        """Same shape as the skill_analysis section of a Gemini analysis."""
+        found = self.find(resume_text)
+        matching = [skill for skill in self.primary_skills if skill in found]
+        score = round(100 * len(matching) / len(self.primary_skills)) if self.primary_skills else 0
+        return {
+            "match_score": score,
+            "matching_skills": matching,
+            "missing_primary_skills": [skill for skill in self.primary_skills if skill not in found],
+            "matching_secondary_skills": [skill for skill in self.secondary_skills if skill in found],
+            "missing_secondary_skills": [skill for skill in self.secondary_skills if skill not in found],
+        }
+
+
+@lru_cache(maxsize=256)
+def _compiled_matcher(primary_skills: Tuple[str, ...], secondary_skills: Tuple[str, ...]) -> SkillMatcher:
+    return SkillMatcher(list(primary_skills), list(secondary_skills))
+
+
+def get_skill_matcher(jd_data: Dict) -> SkillMatcher:
+    """Compiled matcher for a JD, reused across resumes screened against it."""
+    return _compiled_matcher(
+        tuple(jd_data.get("primary_skills") or []),
+        tuple(jd_data.get("secondary_skills") or []),
+    )
+
+
+def match_skills(resume_text: str, jd_data: Dict) -> Dict:
+    return get_skill_matcher(jd_data).analyze(resume_text)
+
+
+def get_screen_mode(override: Optional[str] = None) -> str:
+    """
+    off: always run the full Gemini analysis (default)
+    prefilter: skip Gemini when the local match_score is below SKILL_PREFILTER_MIN_SCORE
+    fast: local skill matching only, never call Gemini
+    """
+    mode = (override or os.getenv("SKILL_SCREEN_MODE") or "off").strip().lower()
+    if mode not in SCREEN_MODES:
+        raise ValueError(f"Unknown screen mode '{mode}' (expected one of {', '.join(SCREEN_MODES)})")
+    return mode
+
+
+def should_skip_llm(skill_analysis: Dict, jd_data: Dict) -> bool:
+    """Prefilter rule: clearly non-matching resumes don't get a Gemini call."""
+    if not jd_data.get("primary_skills"):
+        return False
+    return skill_analysis["match_score"] < get_env_int("SKILL_PREFILTER_MIN_SCORE", 20)
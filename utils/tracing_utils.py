@@ -0,0 +1,182 @@
+import contextvars
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.common_utils import get_env_float, get_env_int
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # Optional: profiling just stays off without it
+    Profiler = None
+
+# Per-request tracing. TracingMiddleware gives every HTTP request an id
+# (X-Request-ID, taken from the caller when present) and a Trace that
+# span() records into; requests slower than SLOW_REQUEST_MS are logged
+# with their span breakdown.
+#
+# Sampling profiler, off unless PROFILING_ENABLED=true: a fraction
+# (PROFILE_SAMPLE_RATE) of requests, or any request sent with
+# "X-Profile: 1", runs under pyinstrument and the HTML report is written
+# to PROFILE_DIR/<request id>.html. pyinstrument samples the event loop
+# thread, so time inside executor threads shows up as the awaiting frame.
+
+REQUEST_ID_HEADER = "x-request-id"
+PROFILE_HEADER = "x-profile"
+
+
+class Trace:
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, started: float, duration: float, error: bool) -> None:
+        # Spans are recorded from executor threads too
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 1),
+                "duration_ms": round(duration * 1000, 1),
+                "error": error,
+            })
+
+    def breakdown(self) -> str:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda item: item["start_ms"])
+        return ", ".join(
+            f"{item['name']}={item['duration_ms']:.0f}ms@{item['start_ms']:.0f}" + ("!" if item["error"] else "")
+            for item in spans
+        )
+
+
+_trace: contextvars.ContextVar = contextvars.ContextVar("request_trace", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    trace = _trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the block as a span of the current request (no-op outside a request)."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        trace.add_span(name, started, time.perf_counter() - started, error)
+
+
+def _valid_request_id(request_id: str) -> bool:
+    # Caller-supplied ids end up in logs and file names
+    return 0 < len(request_id) <= 64 and all(char.isalnum() or char in "-_" for char in request_id)
+
+
+def _profiling_enabled() -> bool:
+    return Profiler is not None and os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+
+def _should_profile(headers: Dict[str, str]) -> bool:
+    if not _profiling_enabled():
+        return False
+    if headers.get(PROFILE_HEADER) == "1":
+        return True
+    return random.random() < get_env_float("PROFILE_SAMPLE_RATE", 0.0)
+
+
+def get_profile_path(request_id: str) -> Optional[str]:
+    """Path of a stored profile report, if there is one."""
+    if not _valid_request_id(request_id):
+        return None
+    path = os.path.join(os.getenv("PROFILE_DIR", "profiles"), f"{request_id}.html")
+    return path if os.path.exists(path) else None
+
+
+def _save_profile(profiler, trace: Trace) -> Optional[str]:
+    try:
+        directory = os.getenv("PROFILE_DIR", "profiles")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{trace.request_id}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        return path
+    except Exception as e:
+        print(f"Failed to save profile for request {trace.request_id}: {e}")
+        return None
+
+
+class TracingMiddleware:
+    """
+    Plain ASGI middleware (not BaseHTTPMiddleware) so the trace context
+    reaches the endpoint and streamed responses are timed to their last byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        request_id = headers.get(REQUEST_ID_HEADER, "")
+        if not _valid_request_id(request_id):
+            request_id = uuid.uuid4().hex
+        trace = Trace(request_id, scope.get("method", ""), scope.get("path", ""))
+        token = _trace.set(trace)
+        status = {"code": 500}
+
+        profiler = None
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            if _should_profile(headers):
+                try:
+                    profiler = Profiler(async_mode="enabled")
+                    profiler.start()
+                except Exception as e:
+                    # Profiling is best effort: serve the request unprofiled
+                    print(f"Profiler not started for request {request_id}: {e}")
+                    profiler = None
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration_ms = (time.perf_counter() - trace.started) * 1000
+            _trace.reset(token)
+            profile_path = None
+            if profiler is not None:
+                try:
+                    profiler.stop()
+                    profile_path = _save_profile(profiler, trace)
+                except Exception as e:
+                    print(f"Profiler failed for request {request_id}: {e}")
+            slow = duration_ms >= get_env_int("SLOW_REQUEST_MS", 2000)
+            if slow or profile_path:
+                print(
+                    f"{'Slow request' if slow else 'Profiled request'} {request_id} {trace.method} {trace.path}"
+                    f" -> {status['code']} in {duration_ms:.0f}ms [{trace.breakdown() or 'no spans'}]"
+                    + (f" profile={profile_path}" if profile_path else "")
+                )